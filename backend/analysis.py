@@ -0,0 +1,98 @@
+import re
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+# The content script joins the page's paragraphs with blank lines
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_paragraphs(content: str) -> List[str]:
+    """Split submitted content on blank lines, dropping empty paragraphs"""
+    paragraphs = [paragraph.strip() for paragraph in PARAGRAPH_BREAK.split(content)]
+    return [paragraph for paragraph in paragraphs if paragraph] or [content.strip()]
+
+
+def score_paragraph(text: str) -> Dict[str, Any]:
+    """Score one paragraph; the result depends only on its text.
+
+    Kept free of app state so it can run in worker processes.
+    """
+    # Generate placeholder paragraph scores
+    return {
+        "trustScore": 85,  # Placeholder trust score
+        "confidence": 92,  # Placeholder confidence score
+        "sentiment": 0.75,  # Placeholder sentiment score (range: -1 to 1)
+    }
+
+
+def score_paragraphs(texts: Sequence[str]) -> List[Dict[str, Any]]:
+    """Score several paragraphs in one call, e.g. one worker-process round trip"""
+    return [score_paragraph(text) for text in texts]
+
+
+def aggregate_scores(paragraphs: Sequence[str], scores: Sequence[Dict[str, Any]],
+                     analysis_id: Optional[str] = None) -> Dict[str, Any]:
+    """Combine per-paragraph scores into the article-level analysis.
+
+    Paragraphs are weighted by length, so a one-line caption does not count
+    as much as the body text around it.
+    """
+    weights = [max(len(paragraph), 1) for paragraph in paragraphs]
+    total = sum(weights)
+
+    def weighted(field: str) -> float:
+        return sum(score[field] * weight for score, weight in zip(scores, weights)) / total
+
+    analysis_result = {
+        "rating": round(weighted("trustScore"), 2),
+        "confidence": round(weighted("confidence"), 2),
+        "sentiment": {
+            "score": round(weighted("sentiment"), 4),
+        },
+        "id": analysis_id or str(uuid.uuid4())  # Generate unique ID for analysis
+    }
+    sentiment_score = analysis_result["sentiment"]["score"]
+    analysis_result["sentiment"]["label"] = (
+        "positive" if sentiment_score > 0.1 else "negative" if sentiment_score < -0.1 else "neutral"
+    )
+
+    return {
+        "trustScore": analysis_result["rating"],
+        "confidence": analysis_result["confidence"],
+        "sentiment": analysis_result["sentiment"],
+        "criteria": build_criteria(
+            analysis_result["rating"], analysis_result["confidence"], analysis_result["sentiment"]["score"]
+        ),
+        "analysisId": analysis_result["id"],
+    }
+
+
+def build_criteria(trust_score: float, confidence: float, sentiment_score: float) -> List[Dict[str, Any]]:
+    """The criteria checklist for an article's final trust score, confidence and sentiment"""
+    return [
+        {
+            "name": "Content Trust Level",
+            "met": trust_score >= 70,
+            "score": trust_score
+        },
+        {
+            "name": "Accuracy and Fairness",
+            "met": trust_score >= 75,
+            "score": trust_score * 0.95
+        },
+        {
+            "name": "Independence",
+            "met": confidence >= 68,
+            "score": confidence * 100
+        },
+        {
+            "name": "Impartiality",
+            "met": abs(sentiment_score) <= 0.3,
+            "score": (1 - abs(sentiment_score)) * 100
+        },
+        {
+            "name": "Accountability",
+            "met": trust_score >= 80 and confidence >= 0.85,
+            "score": (trust_score + confidence * 100) / 2
+        }
+    ]
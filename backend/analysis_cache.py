@@ -0,0 +1,216 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from analysis import split_paragraphs
+from sqlite_state import SQLiteState
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so re-scraped pages hash identically"""
+    return " ".join(text.split())
+
+
+def content_hash(title: str, content: str, url: Optional[str] = None) -> str:
+    """Stable hash of an article's normalized title and paragraphs (and URL if given).
+
+    Whitespace is collapsed inside each paragraph but the paragraph breaks
+    are kept, since scores are aggregated per paragraph.
+    """
+    digest = hashlib.sha256()
+    digest.update(normalize_text(title).encode("utf-8"))
+    for paragraph in split_paragraphs(content):
+        digest.update(b"\x00")
+        digest.update(normalize_text(paragraph).encode("utf-8"))
+    if url:
+        digest.update(b"\x01")
+        digest.update(url.strip().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def paragraph_hash(text: str) -> str:
+    """Stable hash of one normalized paragraph"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Bounded in-process LRU cache with a per-entry TTL.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    reached, and lazily dropped on access once older than ``ttl_seconds``.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SQLiteAnalysisCache:
+    """Analysis cache shared by every process using the same SQLite file.
+
+    Same interface as :class:`AnalysisCache`. Writes are buffered and
+    committed in batches by :class:`SQLiteState`. Entries expire
+    ``ttl_seconds`` after they were stored (wall clock, since processes
+    share them); beyond ``max_entries`` the oldest stored are evicted, so
+    eviction is FIFO rather than LRU, as recording every hit would turn
+    reads into writes. Hit and miss counters are per process.
+    """
+
+    def __init__(self, state: SQLiteState, table: str = "analysis_cache",
+                 max_entries: int = 1024, ttl_seconds: float = 600.0):
+        self.state = state
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self._pending: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._flushing: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Eviction scans the table, so it only runs once 10% more entries were written
+        self._written_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        state.register(self, [
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_stored_at ON {table} (stored_at)",
+        ])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self._pending.get(key) or self._flushing.get(key)
+            if entry is None:
+                row = self.state.reader().execute(
+                    f"SELECT stored_at, value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                entry = (row[0], json.loads(row[1])) if row is not None else None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                # Expired rows are deleted by the next eviction pass
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self.lock:
+            self._pending[key] = (time.time(), value)
+            waiting = len(self._pending)
+        if waiting >= self.state.flush_rows:
+            self.state.wake()
+
+    def take_pending(self) -> None:
+        self._flushing, self._pending = self._pending, {}
+
+    def write_pending(self, conn: sqlite3.Connection) -> None:
+        if not self._flushing:
+            return
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {self.table} (key, stored_at, value) VALUES (?, ?, ?)",
+            [(key, stored_at, json.dumps(value)) for key, (stored_at, value) in self._flushing.items()],
+        )
+        self._written_since_evict += len(self._flushing)
+        if self._written_since_evict >= max(1, self.max_entries // 10):
+            self._evict(conn)
+
+    def flushed(self) -> None:
+        self._flushing = {}
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        self._written_since_evict = 0
+        expired = conn.execute(
+            f"DELETE FROM {self.table} WHERE stored_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        evicted = conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f" SELECT key FROM {self.table} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self.evictions += expired + evicted
+
+    def clear(self) -> None:
+        with self.lock:
+            self._pending.clear()
+            self.state.reader().execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        return self.state.reader().execute(f"SELECT count(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "size": len(self),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,133 @@
+"""Load test of /analyze and /sentiment/history across uvicorn worker processes.
+
+Starts extension_communicator under uvicorn with 1, 2, 4... workers against a
+throwaway state file, fires --requests analyses spread over --urls URLs, then
+reads every URL's history back on fresh connections (so different workers
+answer) and checks each one holds exactly the points that were written:
+
+    python bench_shared_state.py --workers 1 2 4 --backend sqlite
+    python bench_shared_state.py --workers 4 --backend memory   # inconsistent
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, backend: str, workdir: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "STATE_BACKEND": backend,
+        "STATE_DB_PATH": os.path.join(workdir, "state.db"),
+        "ANALYSIS_JOBS_DB": os.path.join(workdir, "jobs.db"),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "extension_communicator:app",
+         "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def run(args, workers: int, backend: str) -> None:
+    import httpx
+
+    workdir = tempfile.mkdtemp(prefix="state-bench-")
+    port = free_port()
+    server = start_server(workers, backend, workdir, port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30,
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            for _ in range(300):
+                try:
+                    await client.get("/cache/stats")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            # Let every worker finish starting up before timing
+            await asyncio.sleep(1 + workers * 0.5)
+
+            written: Counter = Counter()
+            latencies: List[float] = []
+            queue: asyncio.Queue = asyncio.Queue()
+            for i in range(args.requests):
+                queue.put_nowait(i)
+
+            async def worker():
+                while not queue.empty():
+                    i = queue.get_nowait()
+                    url = f"https://site{i % args.urls}.example/article"
+                    started = time.perf_counter()
+                    response = await client.post("/analyze", json={
+                        "title": f"Article {i}", "content": f"Paragraph {i}.\n\nBody text.", "url": url,
+                    })
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    written[url] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+        # Wait out the batched flush, then read back on new connections so
+        # that the kernel hands requests to different workers
+        await asyncio.sleep(1)
+        mismatched = 0
+        for url, count in written.items():
+            answers = set()
+            for _ in range(args.reads):
+                async with httpx.AsyncClient(base_url=base_url, timeout=30) as reader:
+                    history = (await reader.get("/sentiment/history", params={"url": url})).json()["history"]
+                answers.add((len(history), tuple(point["timestamp"] for point in history)))
+            if len(answers) != 1 or next(iter(answers))[0] != count:
+                mismatched += 1
+
+        print(
+            f"{backend:<8}{workers:>8}{len(latencies) / elapsed:>10.0f}"
+            f"{statistics.median(latencies):>10.1f}{percentile(latencies, 99):>10.1f}"
+            f"{len(written) - mismatched:>10}/{len(written)}"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--urls", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=4, help="history reads per URL")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.requests} analyses over {args.urls} URLs, "
+          f"concurrency {args.concurrency}")
+    print(f"{'backend':<8}{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'consistent':>14}")
+    for workers in args.workers:
+        asyncio.run(run(args, workers, args.backend))
+
+
+if __name__ == "__main__":
+    main()
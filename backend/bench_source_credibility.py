@@ -0,0 +1,75 @@
+"""Lookup throughput of the source credibility table over a large domain list.
+
+Writes --domains synthetic domain,score rows to a throwaway CSV, loads it the
+way the server does, then times lookups for listed hosts, subdomains of
+listed hosts and unlisted hosts:
+
+    python bench_source_credibility.py --domains 1000000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+TLDS = ["com", "org", "net", "co.uk", "de", "fr", "info", "news", "com.au", "co.jp"]
+
+
+def make_domain() -> str:
+    name = "".join(random.choices(string.ascii_lowercase + string.digits, k=random.randint(4, 14)))
+    return f"{name}.{random.choice(TLDS)}"
+
+
+def timed(label: str, func, queries, repeat: int) -> None:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    elapsed = time.perf_counter() - started
+    lookups = repeat * len(queries)
+    print(f"{label:<28}{lookups / elapsed:>14,.0f}{elapsed / lookups * 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--domains", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from net_shared.source_credibility import SourceCredibility, hostname_of
+
+    domains = list({make_domain() for _ in range(args.domains)})
+    path = os.path.join(tempfile.mkdtemp(prefix="credibility-bench-"), "domains.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("domain,score,name\n")
+        for domain in domains:
+            f.write(f"{domain},{random.randint(0, 100)},\n")
+
+    credibility = SourceCredibility(path)
+    started = time.perf_counter()
+    credibility.reload_if_changed()
+    print(f"Loaded {len(credibility.table):,} domains in {time.perf_counter() - started:.2f}s, "
+          f"{credibility.table.nbytes / 1e6:.1f} MB of table")
+
+    listed = random.sample(domains, args.queries)
+    subdomains = [f"{random.choice(['www', 'edition', 'news.eu'])}.{domain}" for domain in listed]
+    unlisted = [f"www.{make_domain()}" for _ in range(args.queries)]
+    urls = [f"https://{host}/2025/01/01/some-article-slug" for host in subdomains]
+
+    table = credibility.table
+    print(f"\n{'lookup':<28}{'lookups/s':>14}{'us each':>10}")
+    timed("listed host", table.match_uncached, listed, args.repeat)
+    timed("subdomain of listed host", table.match_uncached, subdomains, args.repeat)
+    timed("unlisted host", table.match_uncached, unlisted, args.repeat)
+    # lookup() goes through the per-table match cache, warm after the first pass
+    timed("full URL via lookup()", lambda url: credibility.lookup(url=url), urls, args.repeat)
+    timed("hostname_of(url) only", hostname_of, urls, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
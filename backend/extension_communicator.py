@@ -1,15 +1,43 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
 import uuid
 
-# Configure logging
-logging.basicConfig(
+from fastapi.concurrency import run_in_threadpool
+
+# Modules shared with the news API live in net_shared/ at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import aggregate_scores, build_criteria, score_paragraphs, split_paragraphs
+from analysis_cache import AnalysisCache, SQLiteAnalysisCache, content_hash, paragraph_hash
+from history_downsample import downsample_history
+from history_store import SentimentHistoryStore, SQLiteHistoryStore
+from job_queue import FINISHED, JobQueue, JobStore, QueueFullError
+from sqlite_state import SQLiteState
+from net_shared.http_cache import CACHE_CONTROL, etag_matches, not_modified, weak_etag
+from net_shared.log_queue import configure_logging
+from net_shared.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from net_shared.singleflight import SingleFlight
+from net_shared.source_credibility import DEFAULT_TABLE_PATH, SourceCredibility
+
+# Configure logging. Records are written by a background thread; only
+# LOG_SAMPLE_RATE of requests keep their INFO lines (warnings always do)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+configure_logging(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    sample_rate=LOG_SAMPLE_RATE,
 )
 logger = logging.getLogger(__name__)
 
@@ -25,106 +53,486 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "Origin"],
-    expose_headers=["Content-Type"],
+    allow_headers=["Content-Type", "Authorization", "Origin", "If-None-Match"],
+    expose_headers=["Content-Type", "ETag"],
     max_age=3600
 )
 
+# Per-route latency, in-flight requests and cache counters, served at /metrics
+metrics = Metrics("extension")
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 class ArticleData(BaseModel):
     title: str
     content: str
     url: Optional[str] = None  # Make URL optional
 
+class BatchAnalysisRequest(BaseModel):
+    articles: List[ArticleData]
+
 class SentimentHistoryResponse(BaseModel):
     history: List[Dict[str, Any]]
+    # Points in the requested range before downsampling
+    total: int = 0
+    downsampled: bool = False
+    bucketSeconds: Optional[float] = None
+
+# Where history and cached analyses live. "memory" keeps them per process;
+# "sqlite" shares them between uvicorn workers (and restarts) through one
+# WAL-mode file, with writes batched by a background flush
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "./extension_state.db")
+STATE_FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", "0.05"))
+if STATE_BACKEND not in ("memory", "sqlite"):
+    raise ValueError(f"Unknown STATE_BACKEND {STATE_BACKEND!r}; expected 'memory' or 'sqlite'")
+shared_state = SQLiteState(STATE_DB_PATH, flush_interval=STATE_FLUSH_INTERVAL) if STATE_BACKEND == "sqlite" else None
+
+# Sentiment history, bounded per URL (and in total, in memory)
+HISTORY_POINTS_PER_URL = int(os.getenv("HISTORY_POINTS_PER_URL", "4096"))
+HISTORY_MAX_BYTES = int(os.getenv("HISTORY_MAX_BYTES", str(64 * 1024 * 1024)))
+if shared_state is not None:
+    sentiment_history_db = SQLiteHistoryStore(shared_state, points_per_url=HISTORY_POINTS_PER_URL)
+else:
+    sentiment_history_db = SentimentHistoryStore(
+        points_per_url=HISTORY_POINTS_PER_URL, max_bytes=HISTORY_MAX_BYTES
+    )
+# Most points /sentiment/history returns; longer ranges are downsampled
+HISTORY_DEFAULT_POINTS = int(os.getenv("HISTORY_DEFAULT_POINTS", "1000"))
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "10000"))
+
+# Analysis results keyed by content hash, so repeat views skip recomputation
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "600"))
+
+# Per-paragraph scores keyed by paragraph hash, so a re-fetched page only
+# rescores the paragraphs that changed since it was last analyzed
+PARAGRAPH_CACHE_SIZE = int(os.getenv("PARAGRAPH_CACHE_SIZE", "65536"))
+
+if shared_state is not None:
+    analysis_cache = SQLiteAnalysisCache(
+        shared_state, "analysis_cache", max_entries=ANALYSIS_CACHE_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL
+    )
+    paragraph_cache = SQLiteAnalysisCache(
+        shared_state, "paragraph_cache", max_entries=PARAGRAPH_CACHE_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL
+    )
+else:
+    analysis_cache = AnalysisCache(max_entries=ANALYSIS_CACHE_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL)
+    paragraph_cache = AnalysisCache(max_entries=PARAGRAPH_CACHE_SIZE, ttl_seconds=ANALYSIS_CACHE_TTL)
+
+# Concurrent misses for the same content share one computation
+analysis_flight = SingleFlight()
+
+# Batch scoring fans out across worker processes, created on first use.
+# They are spawned rather than forked: this process runs logging, executor
+# and SQLite threads whose locks a forked child could inherit while held
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=ANALYSIS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+# Per-domain reputation table; the trust score of an article from a listed
+# source is that source's score. The file is re-read whenever it changes.
+SOURCE_CREDIBILITY_PATH = os.getenv("SOURCE_CREDIBILITY_PATH", DEFAULT_TABLE_PATH)
+SOURCE_CREDIBILITY_RELOAD_SECONDS = float(os.getenv("SOURCE_CREDIBILITY_RELOAD_SECONDS", "5"))
+source_credibility = SourceCredibility(SOURCE_CREDIBILITY_PATH)
+_credibility_watch: Optional[asyncio.Task] = None
+
+# Queued analysis jobs, persisted in SQLite and drained by a fixed worker pool
+ANALYSIS_JOBS_DB = os.getenv("ANALYSIS_JOBS_DB", "./analysis_jobs.db")
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "4"))
+ANALYSIS_JOB_QUEUE_SIZE = int(os.getenv("ANALYSIS_JOB_QUEUE_SIZE", "100"))
+ANALYSIS_JOB_RETENTION = float(os.getenv("ANALYSIS_JOB_RETENTION", str(24 * 3600)))
+# Longest a job WebSocket waits before re-sending the job's current status
+JOB_WEBSOCKET_PING_SECONDS = 15
+job_queue: Optional[JobQueue] = None
 
-# In-memory storage for sentiment history
-sentiment_history_db: Dict[str, List[Dict[str, Any]]] = {}
+metrics.register_stats("analysis_cache", analysis_cache.stats)
+metrics.register_stats("paragraph_cache", paragraph_cache.stats)
+metrics.register_stats("single_flight", analysis_flight.stats)
+metrics.register_stats("history", sentiment_history_db.stats)
+metrics.register_stats("jobs", lambda: job_queue.stats() if job_queue is not None else {})
+metrics.register_stats("source_credibility", source_credibility.stats)
+
+@app.on_event("startup")
+async def startup_event():
+    global job_queue, _credibility_watch
+    source_credibility.reload_if_changed()
+    _credibility_watch = asyncio.ensure_future(source_credibility.watch(SOURCE_CREDIBILITY_RELOAD_SECONDS))
+
+    store = await run_in_threadpool(JobStore, ANALYSIS_JOBS_DB)
+    pruned = await run_in_threadpool(store.prune, ANALYSIS_JOB_RETENTION)
+    job_queue = JobQueue(
+        store, _run_analysis_job, workers=ANALYSIS_JOB_WORKERS, max_queued=ANALYSIS_JOB_QUEUE_SIZE
+    )
+    recovered = await job_queue.start()
+    logger.info(f"Analysis job queue started ({recovered} jobs recovered, {pruned} pruned)")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    global _process_pool
+    if _credibility_watch is not None:
+        _credibility_watch.cancel()
+    if job_queue is not None:
+        await job_queue.stop()
+        job_queue.store.close()
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+    if shared_state is not None:
+        # Commit whatever is still buffered
+        shared_state.close()
+
+async def _analyze_and_cache(cache_key: str, article: ArticleData,
+                             executor: Optional[ProcessPoolExecutor] = None) -> Dict[str, Any]:
+    """Score an article, reusing cached scores of paragraphs seen before.
+
+    New paragraphs are scored in a worker thread, or in ``executor`` if given.
+    """
+    paragraphs = split_paragraphs(article.content)
+    keys = [paragraph_hash(paragraph) for paragraph in paragraphs]
+    scores = [paragraph_cache.get(key) for key in keys]
+
+    # Score each distinct missing paragraph once
+    missing = {key: paragraph for key, paragraph, score in zip(keys, paragraphs, scores) if score is None}
+    if missing:
+        texts = list(missing.values())
+        if executor is None:
+            computed = await run_in_threadpool(score_paragraphs, texts)
+        else:
+            computed = await asyncio.get_running_loop().run_in_executor(executor, score_paragraphs, texts)
+        for key, score in zip(missing, computed):
+            paragraph_cache.set(key, score)
+        fresh = dict(zip(missing, computed))
+        scores = [score if score is not None else fresh[key] for key, score in zip(keys, scores)]
+
+    analysis = aggregate_scores(paragraphs, scores)
+    recomputed = sum(1 for key in keys if key in missing)
+    analysis["paragraphs"] = {
+        "total": len(paragraphs),
+        "reused": len(paragraphs) - recomputed,
+        "recomputed": recomputed,
+    }
+    analysis_cache.set(cache_key, analysis)
+    return analysis
+
+def _as_reused(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """A cached analysis, reporting every paragraph as reused"""
+    total = analysis["paragraphs"]["total"]
+    return {**analysis, "paragraphs": {"total": total, "reused": total, "recomputed": 0}}
+
+def _with_source(analysis: Dict[str, Any], url: Optional[str]) -> Dict[str, Any]:
+    """Attach the source's credibility, which sets the trust score and the criteria derived from it.
+
+    Unlisted sources get the credibility table's default score, as they do in
+    the news API.
+    """
+    source = source_credibility.lookup(url=url) if url else None
+    trust_score = source["score"] if source is not None else source_credibility.default_score
+    criteria = build_criteria(trust_score, analysis["confidence"], analysis["sentiment"]["score"])
+    return {**analysis, "source": source, "trustScore": trust_score, "criteria": criteria}
+
+async def _analyze_article(article: ArticleData, executor: Optional[ProcessPoolExecutor] = None,
+                           record_history: bool = True) -> Dict[str, Any]:
+    """Analyze an article as ``/analyze`` does, recording its sentiment history unless told not to"""
+    # Identical title + content always scores the same, so reuse earlier results
+    cache_key = content_hash(article.title, article.content)
+    analysis = analysis_cache.get(cache_key)
+    cached = analysis is not None
+    if cached:
+        analysis = _as_reused(analysis)
+    else:
+        analysis = await analysis_flight.do(
+            cache_key, lambda: _analyze_and_cache(cache_key, article, executor)
+        )
+
+    # Store sentiment history for the URL
+    if record_history and article.url:
+        sentiment_history_db.append(article.url, analysis["sentiment"]["score"])
+
+    # Format response
+    return {
+        **_with_source(analysis, article.url),
+        "articleUrl": article.url or "unknown",
+        "cached": cached
+    }
 
 @app.post("/analyze")
 async def analyze_content(article: ArticleData):
     try:
-        logger.info(f"Received analysis request")
-        logger.info(f"Title: {article.title}")
-        logger.info(f"Content length: {len(article.content)}")
-        logger.info(f"URL: {article.url}")
-
-        # Generate placeholder analysis result
-        analysis_result = {
-            "rating": 85,  # Placeholder trust score
-            "confidence": 92,  # Placeholder confidence score
-            "sentiment": {
-                "score": 0.75,  # Placeholder sentiment score (range: -1 to 1)
-                "label": "positive"  # Placeholder sentiment label
-            },
-            "id": str(uuid.uuid4())  # Generate unique ID for analysis
-        }
+        logger.info("Received analysis request for %s (%d characters)", article.url, len(article.content))
 
-        # Store sentiment history for the URL
-        if article.url:
-            if article.url not in sentiment_history_db:
-                sentiment_history_db[article.url] = []
-            
-            sentiment_history_db[article.url].append({
-                "timestamp": datetime.now().isoformat(),
-                "value": analysis_result["sentiment"]["score"]
-            })
-
-        # Format response
-        analysis_response = {
-            "trustScore": analysis_result["rating"],
-            "confidence": analysis_result["confidence"],
-            "sentiment": analysis_result["sentiment"],
-            "criteria": [
-                {
-                    "name": "Content Trust Level",
-                    "met": analysis_result["rating"] >= 70,
-                    "score": analysis_result["rating"]
-                },
-                {
-                    "name": "Accuracy and Fairness",
-                    "met": analysis_result["rating"] >= 75,
-                    "score": analysis_result["rating"] * 0.95
-                },
-                {
-                    "name": "Independence",
-                    "met": analysis_result["confidence"] >= 68,
-                    "score": analysis_result["confidence"] * 100
-                },
-                {
-                    "name": "Impartiality",
-                    "met": abs(analysis_result["sentiment"]["score"]) <= 0.3,
-                    "score": (1 - abs(analysis_result["sentiment"]["score"])) * 100
-                },
-                {
-                    "name": "Accountability",
-                    "met": analysis_result["rating"] >= 80 and analysis_result["confidence"] >= 0.85,
-                    "score": (analysis_result["rating"] + analysis_result["confidence"] * 100) / 2
-                }
-
-
-            ],
-            "analysisId": analysis_result["id"],
-            "articleUrl": article.url or "unknown"
-        }
+        analysis_response = await _analyze_article(article)
         
-        logger.info(f"Sending analysis response for ID: {analysis_response['analysisId']}")
+        paragraphs = analysis_response["paragraphs"]
+        logger.info(
+            "Sending analysis response for ID: %s (cached: %s, paragraphs reused: %d/%d)",
+            analysis_response["analysisId"], analysis_response["cached"], paragraphs["reused"], paragraphs["total"],
+        )
         return analysis_response
 
     except Exception as e:
         logger.error(f"Error processing analysis request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _format_event(event: str, data: Dict[str, Any], sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
+
+@app.post("/analyze/stream")
+async def analyze_content_stream(article: ArticleData, request: Request):
+    """Streaming variant of ``/analyze`` for progressive rendering.
+
+    Emits a ``header`` event straight away, one ``paragraph`` event per
+    paragraph as its score becomes available (cached ones first), then a
+    ``summary`` event with the same fields as the ``/analyze`` response.
+    Events are NDJSON lines, or Server-Sent Events if the client accepts
+    ``text/event-stream``. Paragraphs not yet scored when the client
+    disconnects are never computed.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    cache_key = content_hash(article.title, article.content)
+    paragraphs = split_paragraphs(article.content)
+    keys = [paragraph_hash(paragraph) for paragraph in paragraphs]
+
+    async def stream_analysis():
+        cached_analysis = analysis_cache.get(cache_key)
+        analysis_id = cached_analysis["analysisId"] if cached_analysis else str(uuid.uuid4())
+        yield _format_event("header", {
+            "analysisId": analysis_id,
+            "articleUrl": article.url or "unknown",
+            "paragraphs": len(paragraphs),
+            "cached": cached_analysis is not None,
+        }, sse)
+
+        try:
+            scores: List[Optional[Dict[str, Any]]] = [paragraph_cache.get(key) for key in keys]
+            for index, score in enumerate(scores):
+                if score is not None:
+                    yield _format_event("paragraph", {"index": index, **score, "cached": True}, sse)
+
+            recomputed = 0
+            for index, key in enumerate(keys):
+                if scores[index] is not None:
+                    continue
+                if await request.is_disconnected():
+                    logger.info(f"Client disconnected, skipping {scores.count(None)} paragraphs of {analysis_id}")
+                    return
+                score = paragraph_cache.get(key)
+                if score is None:
+                    score = (await run_in_threadpool(score_paragraphs, [paragraphs[index]]))[0]
+                    paragraph_cache.set(key, score)
+                    recomputed += 1
+                scores[index] = score
+                yield _format_event("paragraph", {"index": index, **score, "cached": False}, sse)
+
+            counts = {"total": len(paragraphs), "reused": len(paragraphs) - recomputed, "recomputed": recomputed}
+            if cached_analysis is not None:
+                analysis = {**cached_analysis, "paragraphs": counts}
+            else:
+                analysis = {**aggregate_scores(paragraphs, scores, analysis_id), "paragraphs": counts}
+                analysis_cache.set(cache_key, analysis)
+
+            if article.url:
+                sentiment_history_db.append(article.url, analysis["sentiment"]["score"])
+            yield _format_event("summary", {
+                **_with_source(analysis, article.url),
+                "articleUrl": article.url or "unknown",
+                "cached": cached_analysis is not None,
+            }, sse)
+        except asyncio.CancelledError:
+            logger.info(f"Streaming analysis {analysis_id} cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming analysis {analysis_id}: {str(e)}")
+            yield _format_event("error", {"detail": str(e)}, sse)
+
+    return StreamingResponse(
+        stream_analysis(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _analyze_batch_item(index: int, article: ArticleData) -> Dict[str, Any]:
+    """Score one batch item, reporting failure in the item instead of raising"""
+    try:
+        result = await _analyze_article(article, _get_process_pool(), record_history=False)
+        return {"index": index, "result": result}
+    except Exception as e:
+        logger.error(f"Error analyzing batch item {index}: {str(e)}")
+        return {"index": index, "error": str(e)}
+
+@app.post("/analyze/batch")
+async def analyze_batch(batch: BatchAnalysisRequest, stream: bool = False):
+    """Score many articles at once across the worker process pool.
+
+    Results come back in input order, or with ``stream=true`` as NDJSON lines
+    in completion order. A failing item carries an ``error`` instead of a
+    ``result`` and does not fail the batch. Batch scoring does not record
+    sentiment history, since it is not a page view.
+    """
+    if len(batch.articles) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.articles)} articles (max {MAX_BATCH_SIZE})"
+        )
+
+    logger.info("Received batch analysis request for %d articles", len(batch.articles))
+    tasks = [
+        asyncio.ensure_future(_analyze_batch_item(index, article))
+        for index, article in enumerate(batch.articles)
+    ]
+
+    if not stream:
+        results = await asyncio.gather(*tasks)
+        return {
+            "results": results,
+            "count": len(results),
+            "errors": sum(1 for item in results if "error" in item),
+        }
+
+    async def stream_results():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield json.dumps(item) + "\n"
+        finally:
+            # Client went away: drop work that has not started yet
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+async def _run_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await _analyze_article(ArticleData(**payload), _get_process_pool())
+
+@app.post("/analyze/jobs", status_code=202)
+async def submit_analysis_job(article: ArticleData, response: Response) -> Dict[str, Any]:
+    """Queue an analysis and return its job id straight away.
+
+    Answers 429 with a Retry-After header while the queue is full. Poll
+    ``GET /analyze/jobs/{id}`` or open ``/analyze/jobs/{id}/ws`` for the
+    result.
+    """
+    try:
+        job_id = await job_queue.submit(article.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    response.headers["Location"] = f"/analyze/jobs/{job_id}"
+    return {"jobId": job_id, "status": "queued"}
+
+@app.get("/analyze/jobs/{job_id}")
+async def get_analysis_job(job_id: str, wait: float = 0) -> Dict[str, Any]:
+    """Current state of a job; ``wait`` long-polls up to that many seconds for it to finish"""
+    job = await job_queue.wait(job_id, timeout=min(wait, 30)) if wait > 0 else await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.websocket("/analyze/jobs/{job_id}/ws")
+async def analysis_job_updates(websocket: WebSocket, job_id: str):
+    """Send the job's state on connect, again while it is pending, and once it finishes"""
+    await websocket.accept()
+    job = await job_queue.get(job_id)
+    if job is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    await websocket.send_json(job)
+
+    # Clients only listen, so the next message is normally the disconnect;
+    # waiting on it alongside the job stops the wait as soon as they leave
+    received = asyncio.ensure_future(websocket.receive())
+    waiting: Optional[asyncio.Future] = None
+    try:
+        while job["status"] not in FINISHED:
+            if waiting is None:
+                waiting = asyncio.ensure_future(job_queue.wait(job_id, timeout=JOB_WEBSOCKET_PING_SECONDS))
+            await asyncio.wait({waiting, received}, return_when=asyncio.FIRST_COMPLETED)
+            if received.done():
+                if received.result()["type"] == "websocket.disconnect":
+                    logger.info("Client left before job %s finished", job_id)
+                    return
+                # Anything else a client sends is ignored
+                received = asyncio.ensure_future(websocket.receive())
+            if waiting.done():
+                job, waiting = waiting.result(), None
+                await websocket.send_json(job)
+        await websocket.close()
+    finally:
+        received.cancel()
+        if waiting is not None:
+            waiting.cancel()
+
+@app.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters for the analysis result cache"""
+    return {
+        **analysis_cache.stats(),
+        "paragraphs": paragraph_cache.stats(),
+        "singleFlight": analysis_flight.stats(),
+        "history": sentiment_history_db.stats(),
+        "jobs": job_queue.stats() if job_queue is not None else None,
+        "sourceCredibility": source_credibility.stats(),
+    }
+
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    """Request latency, in-flight requests and cache counters in Prometheus text format"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/sentiment/history")
-async def get_sentiment_history(url: str) -> SentimentHistoryResponse:
-    """Get sentiment history for a specific URL"""
-    logger.info(f"Fetching sentiment history for URL: {url}")
-    
-    if url not in sentiment_history_db:
+async def get_sentiment_history(
+    url: str,
+    request: Request,
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Optional[float] = None,
+    points: Optional[int] = None,
+) -> SentimentHistoryResponse:
+    """Get sentiment history for a specific URL.
+
+    ``start``/``end`` limit the time range (naive times are local). At most
+    ``points`` points come back: with ``bucket`` (seconds) as min/mean/max
+    per time bucket, otherwise the series is thinned with LTTB.
+
+    The ETag changes with every point added to the URL's history, so an
+    If-None-Match from a client that is up to date gets 304 before any
+    point is read.
+    """
+    logger.info("Fetching sentiment history for URL: %s", url)
+    if bucket is not None and bucket <= 0:
+        raise HTTPException(status_code=400, detail="bucket must be a positive number of seconds")
+    if points is not None and points < 2:
+        raise HTTPException(status_code=400, detail="points must be at least 2")
+    max_points = min(points or HISTORY_DEFAULT_POINTS, HISTORY_MAX_POINTS)
+
+    version = sentiment_history_db.version(url)
+    if version is None:
         # If no history exists, return empty history
         return SentimentHistoryResponse(history=[])
-    
-    return SentimentHistoryResponse(history=sentiment_history_db[url])
+
+    # The same history answers each query differently, so the query is part of the tag
+    query = f"{start}|{end}|{bucket}|{max_points}".encode("utf-8")
+    etag = weak_etag(f"{version}-{hashlib.sha1(query).hexdigest()[:8]}")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    timestamps, values = sentiment_history_db.points(
+        url,
+        start=start.timestamp() if start is not None else None,
+        end=end.timestamp() if end is not None else None,
+    )
+    return SentimentHistoryResponse(**downsample_history(timestamps, values, max_points, bucket_seconds=bucket))
 
 if __name__ == "__main__":
     import uvicorn
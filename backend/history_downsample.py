@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def bucket_stats(timestamps: np.ndarray, values: np.ndarray, bucket_seconds: float) -> Dict[str, np.ndarray]:
+    """Min / mean / max / count of the values in each ``bucket_seconds`` window.
+
+    ``timestamps`` must be sorted. Buckets are aligned to multiples of
+    ``bucket_seconds`` since the epoch, so the same bucket has the same
+    bounds on every request, and empty buckets are left out. Each bucket's
+    timestamp is its start.
+    """
+    if not len(timestamps):
+        empty = np.zeros(0)
+        return {"timestamp": empty, "min": empty, "mean": empty, "max": empty, "count": empty.astype(np.int64)}
+    bucket_ids = np.floor(timestamps / bucket_seconds).astype(np.int64)
+    # Sorted input, so each bucket is one contiguous run
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    values = values.astype(np.float64)
+    return {
+        "timestamp": bucket_ids[starts] * bucket_seconds,
+        "min": np.minimum.reduceat(values, starts),
+        "mean": np.add.reduceat(values, starts) / counts,
+        "max": np.maximum.reduceat(values, starts),
+        "count": counts,
+    }
+
+
+def lttb(timestamps: np.ndarray, values: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    Keeps the first and last points and, from each of ``threshold - 2``
+    equal-count buckets in between, the point forming the largest triangle
+    with the point kept before it and the average of the next bucket. This
+    preserves peaks and dips that plain decimation or averaging would flatten.
+    """
+    size = len(timestamps)
+    if threshold >= size or threshold < 3:
+        return np.arange(size) if threshold >= size else np.array([0, size - 1][:max(threshold, 0)])
+
+    x = timestamps.astype(np.float64)
+    y = values.astype(np.float64)
+    # Bucket i covers [edges[i], edges[i + 1]) of the points between the ends
+    edges = np.floor(np.linspace(1, size - 1, threshold - 1)).astype(np.int64)
+    # Average of every bucket up front; bucket i uses the average of bucket i + 1
+    sums_x = np.add.reduceat(x[1:size - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:size - 1], edges[:-1] - 1)
+    lengths = np.diff(edges)
+    mean_x = np.r_[sums_x / lengths, x[-1]]
+    mean_y = np.r_[sums_y / lengths, y[-1]]
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        # Twice the triangle area; the constant factor doesn't change the argmax
+        areas = np.abs(
+            (ax - mean_x[bucket + 1]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (mean_y[bucket + 1] - ay)
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(float(timestamp)).isoformat()
+
+
+def downsample_history(timestamps: Sequence[float], values: Sequence[float], max_points: int,
+                       bucket_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """A history series reduced to at most ``max_points`` entries, API shape.
+
+    With ``bucket_seconds``, each entry is one time bucket: ``value`` is the
+    bucket mean, plus its ``min``, ``max`` and ``count``. Buckets are widened
+    when needed to fit ``max_points``. Without it, a series longer than
+    ``max_points`` is thinned with LTTB, keeping the raw points that best
+    preserve its shape.
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    vals = np.asarray(values, dtype=np.float64)
+    result: Dict[str, Any] = {"total": len(ts), "downsampled": False, "bucketSeconds": None}
+
+    if bucket_seconds is not None:
+        if len(ts):
+            # Enough width that the aligned buckets spanning the range fit max_points
+            span = ts[-1] - ts[0]
+            bucket_seconds = max(bucket_seconds, span / max(1, max_points - 1))
+        stats = bucket_stats(ts, vals, bucket_seconds)
+        result["history"] = [
+            {"timestamp": _iso(start), "value": round(float(mean), 6), "min": round(float(low), 6),
+             "max": round(float(high), 6), "count": int(count)}
+            for start, mean, low, high, count in zip(
+                stats["timestamp"], stats["mean"], stats["min"], stats["max"], stats["count"])
+        ]
+        result["downsampled"] = len(stats["count"]) < len(ts)
+        result["bucketSeconds"] = bucket_seconds
+        return result
+
+    if len(ts) > max_points:
+        kept = lttb(ts, vals, max_points)
+        ts, vals = ts[kept], vals[kept]
+        result["downsampled"] = True
+    history: List[Dict[str, Any]] = [
+        {"timestamp": _iso(timestamp), "value": round(float(value), 6)} for timestamp, value in zip(ts, vals)
+    ]
+    result["history"] = history
+    return result
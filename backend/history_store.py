@@ -0,0 +1,299 @@
+import bisect
+import sqlite3
+import threading
+import time
+import uuid
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlite_state import SQLiteState
+
+# Bytes per stored point: float64 epoch timestamp + float32 value
+POINT_BYTES = 8 + 4
+# Rough fixed cost of one series (dict entry, two array headers, bookkeeping)
+SERIES_OVERHEAD_BYTES = 256
+
+
+def _format_history(timestamps: Iterable[float], values: Iterable[float]) -> List[Dict[str, Any]]:
+    """History in the ``{"timestamp": iso, "value": float}`` API shape"""
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            # float32 keeps ~7 significant digits; don't leak float noise
+            "value": round(value, 6),
+        }
+        for ts, value in zip(timestamps, values)
+    ]
+
+
+def _pairwise_average(timestamps: List[float], values: List[float]) -> Tuple[array, array]:
+    return (
+        array("d", ((timestamps[i] + timestamps[i + 1]) / 2 for i in range(0, len(timestamps) - 1, 2))),
+        array("f", ((values[i] + values[i + 1]) / 2 for i in range(0, len(values) - 1, 2))),
+    )
+
+
+class _Series:
+    """One URL's history in two parallel typed arrays, oldest point first"""
+
+    __slots__ = ("timestamps", "values", "version")
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.values = array("f")
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, timestamp: float, value: float) -> None:
+        self.timestamps.append(timestamp)
+        self.values.append(value)
+
+    def roll_up(self, points: int) -> int:
+        """Average the oldest ``points`` points pairwise; returns points freed"""
+        points -= points % 2
+        if points < 2:
+            return 0
+        rolled_ts, rolled_vals = _pairwise_average(self.timestamps[:points], self.values[:points])
+        self.timestamps = rolled_ts + self.timestamps[points:]
+        self.values = rolled_vals + self.values[points:]
+        return points // 2
+
+    def nbytes(self, url: str) -> int:
+        return SERIES_OVERHEAD_BYTES + len(url) + len(self) * POINT_BYTES
+
+
+class SentimentHistoryStore:
+    """Bounded per-URL sentiment history.
+
+    Each series holds at most ``points_per_url`` points. When a series fills
+    up, its oldest half is rolled up into buckets twice as coarse, so recent
+    points stay at full resolution while old ones are kept as averages. The
+    whole store is kept under ``max_bytes``; once over budget, the least
+    recently touched URLs are evicted.
+    """
+
+    def __init__(self, points_per_url: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        if points_per_url < 4:
+            raise ValueError("points_per_url must be at least 4")
+        self.points_per_url = points_per_url
+        self.max_bytes = max_bytes
+        self._series: "OrderedDict[str, _Series]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Versions are unique within this process; the epoch keeps a restarted
+        # (and so emptied) store from reusing one
+        self._epoch = uuid.uuid4().hex[:8]
+        self._appends = 0
+        self.evictions = 0
+        self.rollups = 0
+
+    def append(self, url: str, value: float, timestamp: Optional[float] = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            series = self._series.get(url)
+            if series is None:
+                series = _Series()
+                self._series[url] = series
+                self._bytes += series.nbytes(url)
+            else:
+                self._series.move_to_end(url)
+
+            if len(series) >= self.points_per_url:
+                freed = series.roll_up(len(series) // 2)
+                self._bytes -= freed * POINT_BYTES
+                self.rollups += 1
+
+            series.append(timestamp, value)
+            self._appends += 1
+            series.version = self._appends
+            self._bytes += POINT_BYTES
+            self._evict_cold()
+
+    def _evict_cold(self) -> None:
+        # Never evict the series that was just written
+        while self._bytes > self.max_bytes and len(self._series) > 1:
+            url, series = self._series.popitem(last=False)
+            self._bytes -= series.nbytes(url)
+            self.evictions += 1
+
+    def points(self, url: str, start: Optional[float] = None,
+               end: Optional[float] = None) -> Tuple[array, array]:
+        """Copies of the (timestamps, values) arrays for a URL, optionally
+        only the points with ``start <= timestamp <= end``"""
+        with self._lock:
+            series = self._series.get(url)
+            if series is None:
+                return array("d"), array("f")
+            first = bisect.bisect_left(series.timestamps, start) if start is not None else 0
+            last = bisect.bisect_right(series.timestamps, end) if end is not None else len(series)
+            return series.timestamps[first:last], series.values[first:last]
+
+    def history(self, url: str) -> List[Dict[str, Any]]:
+        """History in the ``{"timestamp": iso, "value": float}`` API shape"""
+        return _format_history(*self.points(url))
+
+    def version(self, url: str) -> Optional[str]:
+        """Changes whenever a point is added to the URL's history; None if it has none"""
+        series = self._series.get(url)
+        return f"{self._epoch}.{series.version}" if series is not None else None
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "urls": len(self._series),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "pointsPerUrl": self.points_per_url,
+            "evictions": self.evictions,
+            "rollups": self.rollups,
+        }
+
+
+class SQLiteHistoryStore:
+    """Sentiment history shared by every process using the same SQLite file.
+
+    Same interface as :class:`SentimentHistoryStore`. Appends are buffered
+    and committed in batches by :class:`SQLiteState`; this process reads its
+    own buffered points back straight away, other processes see them after
+    the next flush. A URL that grows past ``points_per_url`` has its oldest
+    half rolled up into pairwise averages, as in the in-memory store.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS sentiment_history ("
+        " url TEXT NOT NULL, timestamp REAL NOT NULL, value REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_sentiment_history_url_timestamp"
+        " ON sentiment_history (url, timestamp)",
+        # Points ever appended per URL, which serves as its history's version
+        "CREATE TABLE IF NOT EXISTS sentiment_history_versions ("
+        " url TEXT PRIMARY KEY, version INTEGER NOT NULL)",
+    ]
+
+    def __init__(self, state: SQLiteState, points_per_url: int = 4096):
+        if points_per_url < 4:
+            raise ValueError("points_per_url must be at least 4")
+        self.state = state
+        self.points_per_url = points_per_url
+        self.lock = threading.Lock()
+        self._pending: List[Tuple[str, float, float]] = []
+        self._flushing: List[Tuple[str, float, float]] = []
+        self.rollups = 0
+        state.register(self, self.SCHEMA)
+
+    def append(self, url: str, value: float, timestamp: Optional[float] = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            self._pending.append((url, timestamp, float(value)))
+            waiting = len(self._pending)
+        if waiting >= self.state.flush_rows:
+            self.state.wake()
+
+    def take_pending(self) -> None:
+        self._flushing, self._pending = self._pending, []
+
+    def write_pending(self, conn: sqlite3.Connection) -> None:
+        if not self._flushing:
+            return
+        conn.executemany(
+            "INSERT INTO sentiment_history (url, timestamp, value) VALUES (?, ?, ?)", self._flushing
+        )
+        appended = Counter(row[0] for row in self._flushing)
+        conn.executemany(
+            "INSERT INTO sentiment_history_versions (url, version) VALUES (?, ?)"
+            " ON CONFLICT (url) DO UPDATE SET version = version + excluded.version",
+            appended.items(),
+        )
+        for url in appended:
+            self._roll_up(conn, url)
+
+    def flushed(self) -> None:
+        self._flushing = []
+
+    def _roll_up(self, conn: sqlite3.Connection, url: str) -> None:
+        count = conn.execute("SELECT count(*) FROM sentiment_history WHERE url = ?", (url,)).fetchone()[0]
+        if count <= self.points_per_url:
+            return
+        half = count // 2 - (count // 2) % 2
+        rows = conn.execute(
+            "SELECT rowid, timestamp, value FROM sentiment_history WHERE url = ?"
+            " ORDER BY timestamp LIMIT ?", (url, half)
+        ).fetchall()
+        rolled_ts, rolled_vals = _pairwise_average([row[1] for row in rows], [row[2] for row in rows])
+        conn.executemany("DELETE FROM sentiment_history WHERE rowid = ?", [(row[0],) for row in rows])
+        conn.executemany(
+            "INSERT INTO sentiment_history (url, timestamp, value) VALUES (?, ?, ?)",
+            [(url, ts, value) for ts, value in zip(rolled_ts, rolled_vals)],
+        )
+        self.rollups += 1
+
+    def points(self, url: str, start: Optional[float] = None,
+               end: Optional[float] = None) -> Tuple[array, array]:
+        """(timestamps, values) arrays for a URL, oldest first, optionally
+        only the points with ``start <= timestamp <= end``"""
+        low = start if start is not None else float("-inf")
+        high = end if end is not None else float("inf")
+        with self.lock:
+            rows = self.state.reader().execute(
+                "SELECT timestamp, value FROM sentiment_history"
+                " WHERE url = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp", (url, low, high)
+            ).fetchall()
+            unflushed = [
+                (ts, value) for row_url, ts, value in self._flushing + self._pending
+                if row_url == url and low <= ts <= high
+            ]
+        if unflushed:
+            rows = sorted(rows + unflushed)
+        return array("d", (row[0] for row in rows)), array("f", (row[1] for row in rows))
+
+    def history(self, url: str) -> List[Dict[str, Any]]:
+        """History in the ``{"timestamp": iso, "value": float}`` API shape"""
+        return _format_history(*self.points(url))
+
+    def version(self, url: str) -> Optional[str]:
+        """Changes whenever a point is added to the URL's history; None if it has none.
+
+        The same in every process once the point is flushed: appends
+        committed for the URL plus this process's appends still buffered.
+        """
+        with self.lock:
+            row = self.state.reader().execute(
+                "SELECT version FROM sentiment_history_versions WHERE url = ?", (url,)
+            ).fetchone()
+            version = (row[0] if row is not None else 0) + sum(
+                1 for row_url, _, _ in self._flushing + self._pending if row_url == url
+            )
+        return str(version) if version else None
+
+    def __contains__(self, url: str) -> bool:
+        with self.lock:
+            if any(row[0] == url for row in self._flushing + self._pending):
+                return True
+            return self.state.reader().execute(
+                "SELECT 1 FROM sentiment_history WHERE url = ? LIMIT 1", (url,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.state.reader().execute("SELECT count(DISTINCT url) FROM sentiment_history").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.state.path,
+            "pending": len(self._pending),
+            "pointsPerUrl": self.points_per_url,
+            "rollups": self.rollups,
+            "flushes": self.state.flushes,
+            "flushErrors": self.state.flush_errors,
+        }
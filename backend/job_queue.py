@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+# How often a waiter re-reads a job that may be running in another process
+WAIT_POLL_SECONDS = 0.5
+
+
+class QueueFullError(Exception):
+    """Raised by :meth:`JobQueue.submit` when no more jobs can be accepted"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobStore:
+    """Analysis jobs persisted in SQLite, so queued work survives a restart"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_analysis_jobs_status_created_at"
+            " ON analysis_jobs (status, created_at)"
+        )
+        self._lock = threading.Lock()
+
+    def create(self, payload: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO analysis_jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), time.time()),
+            )
+        return job_id
+
+    def claim(self, job_id: str, stale_after: float) -> bool:
+        """Mark a job running unless another worker already has it.
+
+        A job running for more than ``stale_after`` seconds is assumed to
+        belong to a process that died, and can be claimed again.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE analysis_jobs SET status = ?, started_at = ? WHERE id = ?"
+                " AND (status = ? OR (status = ? AND started_at < ?))",
+                (RUNNING, now, job_id, QUEUED, RUNNING, now - stale_after),
+            )
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    FAILED if error is not None else SUCCEEDED,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def release(self, job_ids: List[str]) -> None:
+        """Put running jobs back in the queue, e.g. because this process is stopping"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE analysis_jobs SET status = ?, started_at = NULL WHERE id = ? AND status = ?",
+                [(QUEUED, job_id, RUNNING) for job_id in job_ids],
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM analysis_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "jobId": row["id"],
+            "status": row["status"],
+            "createdAt": row["created_at"],
+            "startedAt": row["started_at"],
+            "finishedAt": row["finished_at"],
+        }
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+    def unfinished(self, stale_after: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """Queued jobs, plus running ones that look abandoned, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM analysis_jobs WHERE status = ?"
+                " OR (status = ? AND started_at < ?) ORDER BY created_at",
+                (QUEUED, RUNNING, time.time() - stale_after),
+            ).fetchall()
+        return [(row["id"], json.loads(row["payload"])) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished jobs that finished more than ``older_than`` seconds ago"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM analysis_jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (SUCCEEDED, FAILED, time.time() - older_than),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """Bounded queue of analysis jobs drained by a fixed number of workers.
+
+    At most ``max_queued`` jobs wait at a time; :meth:`submit` raises
+    :class:`QueueFullError` beyond that, with a retry hint estimated from
+    recent job durations. Jobs left unfinished by a previous process are
+    re-queued by :meth:`start`, even if that overfills the queue.
+
+    Several processes may share one store: a job runs only in the worker
+    that claims it first, and a job left running for ``stale_after``
+    seconds is taken to be abandoned by a dead process. Store calls run in
+    a worker thread, since they can block on another process's write lock.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 workers: int = 4, max_queued: int = 100, stale_after: float = 600.0):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.stale_after = stale_after
+        self._queue: "asyncio.Queue[Tuple[str, Dict[str, Any]]]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._running: Set[str] = set()
+        # Exponentially weighted mean job duration, for Retry-After
+        self._mean_seconds = 1.0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Jobs accepted by submit() but still being written to the store
+        self._submitting = 0
+
+    async def start(self) -> int:
+        """Start the workers; returns the number of recovered jobs"""
+        recovered = await asyncio.to_thread(self.store.unfinished, self.stale_after)
+        for job in recovered:
+            self._queue.put_nowait(job)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        return len(recovered)
+
+    async def stop(self) -> None:
+        # Queued jobs stay queued in the store and interrupted ones are put
+        # back, so the next start() (or another process) picks them up
+        interrupted = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.store.release, interrupted)
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        if self._queue.qsize() + self._submitting >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+        self._submitting += 1
+        try:
+            job_id = await asyncio.to_thread(self.store.create, payload)
+        finally:
+            self._submitting -= 1
+        self._queue.put_nowait((job_id, payload))
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job as it stands in the store"""
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def retry_after(self) -> int:
+        """Seconds until the workers have likely made room in the queue"""
+        batches = max(1, self._queue.qsize() - self.max_queued + 1) / max(1, self.workers)
+        return max(1, round(batches * self._mean_seconds))
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """The job once finished, or as it stands after ``timeout`` seconds.
+
+        Jobs run here wake waiters at once; jobs claimed by another process
+        are noticed by re-reading the store every ``WAIT_POLL_SECONDS``.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED:
+                # Finished in another process, so no local worker will clear it
+                self._waiters.pop(job_id, None)
+                return job
+            if remaining <= 0:
+                return job
+            event = self._waiters.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, WAIT_POLL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self) -> None:
+        while True:
+            job_id, payload = await self._queue.get()
+            if not await asyncio.to_thread(self.store.claim, job_id, self.stale_after):
+                # Recovered by another worker process, which is running it
+                self._queue.task_done()
+                continue
+            self._running.add(job_id)
+            started = time.monotonic()
+            try:
+                result = await self.handler(payload)
+                await asyncio.to_thread(self.store.finish, job_id, result=result)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed: {str(e)}")
+                await asyncio.to_thread(self.store.finish, job_id, error=str(e))
+                self.failed += 1
+            finally:
+                self._running.discard(job_id)
+                self._mean_seconds = 0.8 * self._mean_seconds + 0.2 * (time.monotonic() - started)
+                self._queue.task_done()
+            event = self._waiters.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "running": len(self._running),
+            "workers": self.workers,
+            "maxQueued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "meanSeconds": round(self._mean_seconds, 3),
+        }
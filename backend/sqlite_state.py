@@ -0,0 +1,116 @@
+import contextlib
+import logging
+import sqlite3
+import threading
+from typing import List, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedStore(Protocol):
+    """A store whose writes are buffered in memory and flushed by :class:`SQLiteState`"""
+
+    lock: threading.Lock
+
+    def take_pending(self) -> None:
+        """Move buffered writes aside for the flush in progress; called under ``lock``"""
+
+    def write_pending(self, conn: sqlite3.Connection) -> None:
+        """Write the writes taken aside, inside the flush transaction"""
+
+    def flushed(self) -> None:
+        """Forget the writes taken aside; called under ``lock`` right after commit"""
+
+
+class SQLiteState:
+    """A SQLite file shared by every worker process, written in batches.
+
+    Stores buffer their writes in memory; a background thread commits all of
+    them in one transaction every ``flush_interval`` seconds, or sooner once
+    ``flush_rows`` writes are waiting, so requests never wait on a disk
+    write. Readers use one connection per thread; WAL mode lets them read
+    while another process is writing.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, flush_rows: int = 1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._stores: List[BatchedStore] = []
+        self._local = threading.local()
+        self._writer = self._connect()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        self.flush_errors = 0
+        self._thread = threading.Thread(target=self._run, name="sqlite-state-flush", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """This thread's read connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def register(self, store: BatchedStore, schema: List[str]) -> None:
+        with self._flush_lock:
+            for statement in schema:
+                self._writer.execute(statement)
+            self._stores.append(store)
+
+    def wake(self) -> None:
+        """Ask for an early flush, e.g. because a store has ``flush_rows`` writes waiting"""
+        self._wake.set()
+
+    def flush(self) -> None:
+        """Commit every store's buffered writes in one transaction"""
+        with self._flush_lock:
+            stores = list(self._stores)
+            for store in stores:
+                with store.lock:
+                    store.take_pending()
+            try:
+                self._writer.execute("BEGIN IMMEDIATE")
+                for store in stores:
+                    store.write_pending(self._writer)
+            except Exception:
+                self._writer.execute("ROLLBACK")
+                raise
+            finally:
+                # Commit while holding every store lock, so a reader sees a
+                # write either in the database or still in its store, never
+                # in both or neither
+                with contextlib.ExitStack() as held:
+                    for store in stores:
+                        held.enter_context(store.lock)
+                    if self._writer.in_transaction:
+                        self._writer.execute("COMMIT")
+                    for store in stores:
+                        store.flushed()
+            self.flushes += 1
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # The batch is dropped rather than retried forever
+                self.flush_errors += 1
+                logger.error(f"Failed to flush shared state to {self.path}: {str(e)}")
+
+    def close(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._writer.close()
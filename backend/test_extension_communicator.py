@@ -0,0 +1,240 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# Keep the job queue's database out of the working tree
+os.environ.setdefault("ANALYSIS_JOBS_DB", os.path.join(tempfile.mkdtemp(prefix="extension-test-"), "jobs.db"))
+
+from fastapi.testclient import TestClient
+
+from extension_communicator import analysis_cache, app, paragraph_cache
+
+
+@pytest.fixture
+def client():
+    analysis_cache.clear()
+    paragraph_cache.clear()
+    with TestClient(app) as client:
+        yield client
+
+
+def analyze(client, content, url=None, title="Title"):
+    response = client.post("/analyze", json={"title": title, "content": content, "url": url})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_paragraph_breaks_are_part_of_the_cache_key(client):
+    two = analyze(client, "one\n\ntwo")
+    assert two["paragraphs"] == {"total": 2, "reused": 0, "recomputed": 2}
+
+    one = analyze(client, "one two")
+    assert one["cached"] is False
+    assert one["paragraphs"]["total"] == 1
+
+
+def test_whitespace_inside_paragraphs_still_hits_the_cache(client):
+    analyze(client, "one  two\n\nthree")
+    again = analyze(client, "one two \n\n  three")
+    assert again["cached"] is True
+
+
+def test_criteria_follow_the_source_score(client):
+    result = analyze(client, "Some text.", url="https://www.infowars.com/story")
+    assert result["trustScore"] == 5.0
+    criteria = {criterion["name"]: criterion for criterion in result["criteria"]}
+    assert criteria["Content Trust Level"] == {"name": "Content Trust Level", "met": False, "score": 5.0}
+    assert criteria["Accuracy and Fairness"]["met"] is False
+    assert criteria["Accountability"]["met"] is False
+
+
+def test_unlisted_source_gets_the_default_score(client):
+    from net_shared.source_credibility import UNKNOWN_SOURCE_TRUST_SCORE
+
+    result = analyze(client, "Some text.", url="https://unlisted.example/story")
+    assert result["source"] is None
+    assert result["trustScore"] == UNKNOWN_SOURCE_TRUST_SCORE
+
+
+def test_history_etag_is_weak_and_revalidates(client):
+    url = "https://unlisted.example/history"
+    analyze(client, "Some text.", url=url)
+    response = client.get("/sentiment/history", params={"url": url})
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    revalidated = client.get("/sentiment/history", params={"url": url}, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+
+
+class HangingUpWebSocket:
+    """Stands in for a job WebSocket whose client disconnects after the first update"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def receive(self):
+        await asyncio.sleep(0.1)
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def close(self, code=1000, reason=None):
+        self.sent.append("closed")
+
+
+def test_job_websocket_stops_waiting_when_the_client_leaves(client, monkeypatch):
+    import extension_communicator
+
+    async def never_finishes(article, executor=None):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(extension_communicator, "_analyze_article", never_finishes)
+    job_id = client.post("/analyze/jobs", json={"title": "Title", "content": "Pending."}).json()["jobId"]
+
+    websocket = HangingUpWebSocket()
+    # Runs on the app's event loop; without the disconnect check this waits for the job forever
+    client.portal.call(asyncio.wait_for, extension_communicator.analysis_job_updates(websocket, job_id), 2)
+    assert len(websocket.sent) == 1
+    assert websocket.sent[0]["status"] in ("queued", "running")
+
+
+def test_job_store_is_used_off_the_event_loop(client, monkeypatch):
+    import threading
+
+    import extension_communicator
+
+    store = extension_communicator.job_queue.store
+    threads = []
+    for name in ("create", "get"):
+        def record(*args, _call=getattr(store, name), **kwargs):
+            threads.append(threading.current_thread())
+            return _call(*args, **kwargs)
+        monkeypatch.setattr(store, name, record)
+
+    job_id = client.post("/analyze/jobs", json={"title": "Title", "content": "Queued."}).json()["jobId"]
+    assert client.get(f"/analyze/jobs/{job_id}").status_code == 200
+    loop_thread = client.portal.call(lambda: threading.current_thread())
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_batch_scores_like_analyze_without_recording_history(client):
+    url = "https://unlisted.example/batch"
+    batch = {"articles": [{"title": "Title", "content": "Batch text.", "url": url}]}
+    response = client.post("/analyze/batch", json=batch)
+    assert response.status_code == 200
+    result = response.json()["results"][0]["result"]
+    assert result["cached"] is False
+    assert client.get("/sentiment/history", params={"url": url}).json()["history"] == []
+
+    again = analyze(client, "Batch text.", url=url)
+    assert again["cached"] is True
+    assert again["sentiment"] == result["sentiment"]
+
+
+def test_full_job_queue_answers_429_with_retry_after(client, monkeypatch):
+    import extension_communicator
+
+    monkeypatch.setattr(extension_communicator.job_queue, "max_queued", 0)
+    rejected = extension_communicator.job_queue.rejected
+    response = client.post("/analyze/jobs", json={"title": "Title", "content": "Too many."})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert extension_communicator.job_queue.rejected == rejected + 1
+
+
+def test_jobs_abandoned_by_a_dead_process_are_recovered(tmp_path):
+    from job_queue import JobQueue, JobStore
+
+    store = JobStore(str(tmp_path / "jobs.db"))
+    queued = store.create({"n": 1})
+    abandoned = store.create({"n": 2})
+    assert store.claim(abandoned, stale_after=600)
+    # Claimed again at once, as by another live worker: too recent to be abandoned
+    assert not store.claim(abandoned, stale_after=600)
+
+    async def double(payload):
+        return {"n": payload["n"] * 2}
+
+    async def restart(stale_after):
+        queue = JobQueue(store, double, workers=1, stale_after=stale_after)
+        recovered = await queue.start()
+        jobs = [await queue.wait(job_id, timeout=0.5) for job_id in (queued, abandoned)]
+        await queue.stop()
+        return recovered, jobs
+
+    recovered, jobs = asyncio.run(restart(stale_after=600))
+    assert recovered == 1
+    assert jobs[0]["result"] == {"n": 2}
+    assert jobs[1]["status"] == "running"
+
+    recovered, jobs = asyncio.run(restart(stale_after=0))
+    assert recovered == 1
+    assert jobs[1]["status"] == "succeeded"
+    assert jobs[1]["result"] == {"n": 4}
+    store.close()
+
+
+def test_history_downsampling_caps_points_and_keeps_the_ends():
+    import random
+    from datetime import datetime
+
+    from history_downsample import downsample_history
+
+    rng = random.Random(0)
+    timestamps = sorted(1_700_000_000 + rng.uniform(0, 86400) for _ in range(5000))
+    values = [rng.uniform(-1, 1) for _ in timestamps]
+    values[2500] = 5.0
+
+    thinned = downsample_history(timestamps, values, max_points=100)
+    assert thinned["downsampled"] is True and thinned["total"] == 5000
+    assert len(thinned["history"]) == 100
+    ends = [thinned["history"][0], thinned["history"][-1]]
+    assert [point["timestamp"] for point in ends] == [
+        datetime.fromtimestamp(timestamps[0]).isoformat(), datetime.fromtimestamp(timestamps[-1]).isoformat()
+    ]
+    assert [point["value"] for point in ends] == [round(values[0], 6), round(values[-1], 6)]
+    assert max(point["value"] for point in thinned["history"]) == 5.0
+
+    # The endpoint asks for at least 2 points
+    for max_points in (2, 7, 100):
+        bucketed = downsample_history(timestamps, values, max_points=max_points, bucket_seconds=60)
+        assert len(bucketed["history"]) <= max_points
+        assert sum(point["count"] for point in bucketed["history"]) == 5000
+
+    short = downsample_history(timestamps[:10], values[:10], max_points=100)
+    assert short["downsampled"] is False and len(short["history"]) == 10
+
+
+def test_singleflight_failure_reaches_every_waiter_and_frees_the_key():
+    from net_shared.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append("failing")
+        await asyncio.sleep(0.01)
+        raise ValueError("scoring failed")
+
+    async def succeeding():
+        calls.append("succeeding")
+        return "ok"
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        assert len(flight) == 0
+        return results, await flight.do("key", succeeding)
+
+    results, retried = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert all(str(result) == "scoring failed" for result in results)
+    assert calls == ["failing", "succeeding"]
+    assert retried == "ok"
+    assert flight.stats() == {"inFlight": 0, "calls": 4, "coalesced": 2}
@@ -0,0 +1 @@
+"""Modules shared by the extension API (backend/) and the news API (news-analyzer/backend/)"""
@@ -0,0 +1,36 @@
+from typing import Optional
+
+from starlette.responses import Response
+
+# Clients may keep responses but must revalidate them with If-None-Match,
+# which costs the server a version lookup instead of a full read
+CACHE_CONTROL = "no-cache"
+
+
+def weak_etag(opaque: str) -> str:
+    """A weak ETag for ``opaque``.
+
+    Tags name a version of the resource, not its bytes, and GZipMiddleware
+    sends the same version gzipped or not; a strong tag would have to differ.
+    """
+    return f'W/"{opaque}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak comparison, as RFC 9110 specifies)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,78 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Optional
+
+# Request/access lines; sampled like every other sub-WARNING record logged
+# while serving a request
+access_logger = logging.getLogger("access")
+
+# Whether the request being served keeps its INFO/DEBUG log records
+_request_sampled: "contextvars.ContextVar[bool]" = contextvars.ContextVar("request_sampled", default=True)
+_sample_rate = 1.0
+
+
+def sample_request() -> contextvars.Token:
+    """Decide whether the current request's low-level records are kept.
+
+    Called once per request, so a sampled request keeps all of its lines
+    rather than a random subset. Returns the token to reset afterwards.
+    """
+    return _request_sampled.set(_sample_rate >= 1.0 or random.random() < _sample_rate)
+
+
+class _SampledRequestFilter(logging.Filter):
+    """Drops INFO and below from requests that were not sampled.
+
+    Warnings and errors, and anything logged outside a request (startup,
+    background tasks), always pass.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or _request_sampled.get()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted.
+
+    The stock ``prepare`` renders ``msg % args`` and any traceback in the
+    caller's thread; here that, like the rest of the formatting, is left to
+    the listener. Arguments are therefore rendered a moment after the call,
+    so log values rather than objects that are about to change.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: int = logging.INFO, format: Optional[str] = None,
+                      sample_rate: float = 1.0) -> logging.handlers.QueueListener:
+    """Route the root logger through a queue drained by a background thread.
+
+    Callers only build a record and enqueue it; formatting and writing to
+    stderr happen on the listener thread, so logging never blocks the event
+    loop on I/O. ``sample_rate`` is the fraction of requests whose INFO and
+    DEBUG records are kept. The listener is flushed and stopped at exit.
+    """
+    global _sample_rate
+    _sample_rate = sample_rate
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter(format))
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    handler.addFilter(_SampledRequestFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,221 @@
+import contextvars
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from net_shared.log_queue import access_logger, sample_request
+
+# Prometheus client library's default latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+# Text exposition format served at /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# [queries, seconds] run by the current request, summed by the engine events
+_request_db: "contextvars.ContextVar[Optional[List[float]]]" = contextvars.ContextVar("request_db", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> (per-bucket counts with a final +Inf bucket, [sum, count])
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), list(totals)) for key, (counts, totals) in self._series.items()]
+        for label_values, counts, (total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class Gauge:
+    """A value per label set that can go up and down"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, amount: float = 1, *label_values: str) -> None:
+        self.inc(-amount, *label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Metrics:
+    """Request, database and cache metrics of one app, in Prometheus text format.
+
+    Latency and database work are recorded per route template (e.g.
+    ``/api/news/{news_id}``), never per raw path, so the number of series
+    stays bounded. Components that already keep counters, such as caches,
+    are exported through :meth:`register_stats` rather than instrumented
+    again: each numeric leaf of their ``stats()`` dict becomes a gauge.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.request_seconds = Histogram(
+            f"{namespace}_http_request_duration_seconds", "Time to serve a request, including streaming",
+            labels=("method", "route", "status"),
+        )
+        self.in_flight = Gauge(f"{namespace}_http_requests_in_flight", "Requests being served")
+        self.request_db_queries = Histogram(
+            f"{namespace}_http_request_db_queries", "Database queries run by one request",
+            labels=("route",), buckets=QUERY_COUNT_BUCKETS,
+        )
+        self.request_db_seconds = Histogram(
+            f"{namespace}_http_request_db_seconds", "Time one request spent in database queries",
+            labels=("route",),
+        )
+        self.query_seconds = Histogram(f"{namespace}_db_query_duration_seconds", "Time to run one database query")
+        self._stats: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def register_stats(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Export the numeric values of ``stats()`` as ``<namespace>_<name>_<key>`` gauges"""
+        self._stats.append((name, stats))
+
+    def instrument_engine(self, engine) -> None:
+        """Time every query run on a (sync) SQLAlchemy engine.
+
+        Pass ``async_engine.sync_engine`` for an async engine. Queries are
+        also added to the totals of the request that ran them.
+        """
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_started"].pop()
+            self.query_seconds.observe(elapsed)
+            totals = _request_db.get()
+            if totals is not None:
+                totals[0] += 1
+                totals[1] += elapsed
+
+    def _render_stats(self, prefix: str, stats: Dict[str, Any], lines: List[str]) -> None:
+        for key, value in stats.items():
+            name = f"{prefix}_{_snake_case(key)}"
+            if isinstance(value, dict):
+                self._render_stats(name, value, lines)
+            elif isinstance(value, (int, float)):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.request_seconds, self.in_flight, self.request_db_queries,
+                       self.request_db_seconds, self.query_seconds):
+            lines.extend(metric.render())
+        for name, stats in self._stats:
+            self._render_stats(f"{self.namespace}_{name}", stats(), lines)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and writes a sampled access log line.
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, so streamed
+    responses pass straight through and ``request.is_disconnected()`` keeps
+    working. A streamed response is timed until its last chunk is sent.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        totals = [0, 0.0]
+        db_token = _request_db.set(totals)
+        log_token = sample_request()
+        self.metrics.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight.dec()
+            # Set by the router once matched; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.request_seconds.observe(elapsed, scope["method"], route, str(status))
+            self.metrics.request_db_queries.observe(totals[0], route)
+            self.metrics.request_db_seconds.observe(totals[1], route)
+            access_logger.info(
+                "%s %s %d %.1fms (%d queries, %.1fms)",
+                scope["method"], scope["path"], status, elapsed * 1000, totals[0], totals[1] * 1000,
+            )
+            _request_db.reset(db_token)
+            log_token.var.reset(log_token)
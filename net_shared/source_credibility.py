@@ -0,0 +1,205 @@
+import asyncio
+import csv
+import logging
+import os
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Longest hostname looked up, in labels; deeper subdomains are truncated
+MAX_LABELS = 10
+# Recently matched hostnames remembered per table; news traffic is dominated
+# by a few hundred sites
+MATCH_CACHE_SIZE = 65536
+# Trust score of a source the table does not list. Every path that scores an
+# article by its source (create, bulk ingest and both analyze endpoints) uses it
+UNKNOWN_SOURCE_TRUST_SCORE = float(os.getenv("UNKNOWN_SOURCE_TRUST_SCORE", "50"))
+# The reputation table both APIs read unless SOURCE_CREDIBILITY_PATH says otherwise
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "source_credibility.csv")
+
+
+def rating_for(score: float) -> str:
+    """The README's High / Medium / Low reliability rating for a 0-100 score"""
+    if score >= 75:
+        return "High"
+    if score >= 50:
+        return "Medium"
+    return "Low"
+
+
+def hostname_of(url_or_host: str) -> str:
+    """Lower-cased hostname of a URL, or of a bare host such as ``cnn.com``.
+
+    A plain string scan rather than ``urlsplit``, which is several times
+    slower and dominated lookup and load times.
+    """
+    value = url_or_host.strip().lower()
+    scheme_end = value.find("//")
+    if scheme_end >= 0:
+        value = value[scheme_end + 2:]
+    for separator in "/?#":
+        end = value.find(separator)
+        if end >= 0:
+            value = value[:end]
+    host = value.rpartition("@")[2]
+    if host.startswith("["):
+        # IPv6 literal, never a listed domain
+        return host[1:host.find("]")]
+    return host.partition(":")[0].rstrip(".")
+
+
+def _normalize_domain(domain: str) -> str:
+    domain = domain.strip().lower()
+    # Table entries are normally bare domains; only parse ones that aren't
+    if "/" in domain or ":" in domain or "@" in domain:
+        return hostname_of(domain)
+    return domain.rstrip(".")
+
+
+class CredibilityTable:
+    """Immutable domain -> score table with longest-suffix hostname matching.
+
+    Domains are stored as a sorted typed array of 64-bit hashes with a
+    parallel float32 score array, about 12 bytes per domain, rather than as
+    strings. A lookup binary-searches for each suffix of the hostname,
+    longest first (``edition.cnn.com``, ``cnn.com``, ``com``), which is the
+    walk a reversed-label trie would do, and stops at the first listed one.
+    Hashes use the process's string hash, so a table is only valid in the
+    process that built it.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, float]], names: Optional[Dict[str, str]] = None):
+        scores_by_domain: Dict[str, float] = {}
+        for domain, score in entries:
+            scores_by_domain[_normalize_domain(domain)] = float(score)
+        hashes = np.fromiter((hash(domain) for domain in scores_by_domain), dtype=np.int64,
+                             count=len(scores_by_domain))
+        order = np.argsort(hashes, kind="stable")
+        scores = np.fromiter(scores_by_domain.values(), dtype=np.float32, count=len(scores_by_domain))
+        # bisect on typed arrays avoids numpy's per-call overhead on tiny queries
+        self._hashes = array("q", hashes[order].tobytes())
+        self._scores = array("f", scores[order].tobytes())
+        # Display names such as "CNN" map to their domain, for News.source
+        self._names = {name.strip().lower(): _normalize_domain(domain) for name, domain in (names or {}).items()}
+        # Safe to memoize since the table never changes; a reload builds a new one
+        self.match = lru_cache(maxsize=MATCH_CACHE_SIZE)(self.match_uncached)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._hashes) * self._hashes.itemsize + len(self._scores) * self._scores.itemsize
+
+    def match_uncached(self, host: str) -> Optional[Tuple[str, float]]:
+        """(matched domain, score) for the longest listed suffix of ``host``"""
+        hashes = self._hashes
+        if not hashes or not host:
+            return None
+        labels = host.split(".")[-MAX_LABELS:]
+        for start in range(len(labels)):
+            suffix = ".".join(labels[start:])
+            wanted = hash(suffix)
+            position = bisect_left(hashes, wanted)
+            if position < len(hashes) and hashes[position] == wanted:
+                return suffix, self._scores[position]
+        return None
+
+    def match_source(self, source: str) -> Optional[Tuple[str, float]]:
+        """Match a source given as a display name ("CNN"), a domain, or a URL"""
+        domain = self._names.get(source.strip().lower())
+        return self.match(domain if domain else hostname_of(source))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "CredibilityTable":
+        """Load a ``domain,score[,name]`` CSV file with a header row"""
+        entries = []
+        names: Dict[str, str] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = csv.reader(f)
+            header = next(rows, [])
+            domain_col, score_col = header.index("domain"), header.index("score")
+            name_col = header.index("name") if "name" in header else None
+            for row in rows:
+                if not row:
+                    continue
+                entries.append((row[domain_col], row[score_col]))
+                if name_col is not None and len(row) > name_col and row[name_col]:
+                    names[row[name_col]] = row[domain_col]
+        return cls(entries, names)
+
+
+class SourceCredibility:
+    """The current credibility table, reloaded whenever its file changes.
+
+    Reloads build a new :class:`CredibilityTable` off the event loop and swap
+    it in whole, so lookups never see a half-loaded table.
+    """
+
+    def __init__(self, path: str, default_score: float = UNKNOWN_SOURCE_TRUST_SCORE):
+        self.path = path
+        self.default_score = default_score
+        self.table = CredibilityTable([])
+        self.reloads = 0
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        signature = self._file_signature()
+        if signature == self._signature:
+            return False
+        if signature is None:
+            logger.warning(f"Source credibility file {self.path} not found; using default scores")
+            self.table = CredibilityTable([])
+        else:
+            self.table = CredibilityTable.from_csv(self.path)
+            logger.info(f"Loaded {len(self.table)} source credibility entries from {self.path}")
+        self._signature = signature
+        self.reloads += 1
+        return True
+
+    async def watch(self, interval: float = 5.0) -> None:
+        """Poll the file every ``interval`` seconds and reload it when it changes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.reload_if_changed)
+            except Exception as e:
+                # Keep serving the previous table until the file is fixed
+                logger.error(f"Failed to reload source credibility from {self.path}: {str(e)}")
+
+    def lookup(self, url: Optional[str] = None, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Credibility of an article's source, trying ``source`` first, then the URL's host"""
+        table = self.table
+        matched = table.match_source(source) if source else None
+        if matched is None and url:
+            matched = table.match(hostname_of(url))
+        if matched is None:
+            return None
+        domain, score = matched
+        return {"domain": domain, "score": round(score, 2), "rating": rating_for(score)}
+
+    def score(self, url: Optional[str] = None, source: Optional[str] = None) -> float:
+        """Trust score for a source, or ``default_score`` if it is not listed"""
+        found = self.lookup(url=url, source=source)
+        return found["score"] if found else self.default_score
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "domains": len(self.table),
+            "bytes": self.table.nbytes,
+            "reloads": self.reloads,
+            "path": self.path,
+        }
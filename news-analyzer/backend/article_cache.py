@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class CachedArticle(NamedTuple):
+    etag: str
+    body: bytes
+
+
+class ArticleCache:
+    """Serialized articles by id, for read-through ``GET /api/news/{id}``.
+
+    Bounded LRU with a per-entry TTL. Writes in this process call
+    :meth:`invalidate`; the TTL bounds how long a write made by another
+    worker process can go unseen. A read that started before an
+    invalidation cannot store what it read, so a slow reader never puts
+    back a version that a writer has just replaced.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; see set()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, news_id: int) -> Optional[CachedArticle]:
+        with self._lock:
+            entry = self._entries.get(news_id)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[news_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(news_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, news_id: int, article: CachedArticle, generation: int) -> None:
+        """Store ``article`` if nothing was invalidated since ``generation`` was read"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[news_id] = (time.monotonic(), article)
+            self._entries.move_to_end(news_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, news_id: int) -> None:
+        with self._lock:
+            self._entries.pop(news_id, None)
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
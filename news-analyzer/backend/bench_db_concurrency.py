@@ -0,0 +1,118 @@
+"""Latency of the news API under concurrent mixed reads and writes.
+
+Runs the app in-process against a throwaway SQLite file and reports
+p50/p95/p99 per operation. Only public endpoints are used, so the same
+script can be pointed at an older checkout to compare before/after:
+
+    python bench_db_concurrency.py --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def make_article(i: int) -> dict:
+    return {
+        "title": f"Benchmark article {i}",
+        "content": "Lorem ipsum dolor sit amet. " * 40,
+        "url": f"https://example.com/bench/{i}",
+        "source": random.choice(["Reuters", "AP", "BBC", "CNN"]),
+        "paragraphs": [
+            {
+                "content": f"Paragraph {n} of article {i}. " * 10,
+                "source": "Benchmark",
+                "order": n,
+                "alternative_views": [{"content": "Another view.", "source": "Other"}],
+            }
+            for n in range(1, 6)
+        ],
+    }
+
+
+async def run(args) -> Dict[str, List[float]]:
+    import httpx
+    from database import Base, engine
+    from main import app
+
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    latencies: Dict[str, List[float]] = {"list": [], "get": [], "create": []}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ids = []
+        for i in range(args.seed):
+            response = await client.post("/api/news/", json=make_article(i))
+            ids.append(response.json()["id"])
+
+        counter = iter(range(args.seed, args.seed + args.requests))
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(None)
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                roll = random.random()
+                start = time.perf_counter()
+                if roll < args.write_ratio:
+                    op = "create"
+                    response = await client.post("/api/news/", json=make_article(next(counter)))
+                    response.raise_for_status()
+                    ids.append(response.json()["id"])
+                elif roll < args.write_ratio + (1 - args.write_ratio) / 2:
+                    op = "list"
+                    response = await client.get("/api/news/", params={"limit": 20})
+                else:
+                    op = "get"
+                    response = await client.get(f"/api/news/{random.choice(ids)}")
+                response.raise_for_status()
+                latencies[op].append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests, concurrency {args.concurrency}, {total / elapsed:.0f} req/s")
+    print(f"{'op':<8}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    everything = [sample for samples in latencies.values() for sample in samples]
+    for op, samples in list(latencies.items()) + [("all", everything)]:
+        if samples:
+            print(
+                f"{op:<8}{len(samples):>8}{statistics.median(samples):>10.1f}"
+                f"{percentile(samples, 95):>10.1f}{percentile(samples, 99):>10.1f}"
+            )
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=200, help="articles created before timing")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    random.seed(0)
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+    # database.py reads DATABASE_URL at import; older checkouts use ./news.db
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'news.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
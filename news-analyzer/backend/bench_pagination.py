@@ -0,0 +1,129 @@
+"""Per-page latency of offset vs cursor pagination over a large synthetic corpus.
+
+Fills a throwaway SQLite file with --rows news rows, then fetches one page of
+/api/news/summary at increasing depths both with ?skip= and with the cursor
+for the same position:
+
+    python bench_pagination.py --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SOURCES = ["Reuters", "AP", "BBC", "CNN", "Al Jazeera", "The Guardian", "NPR", "DW"]
+CATEGORIES = ["politics", "business", "science", "health", "sports", "culture"]
+
+
+def fill_corpus(path: str, rows: int) -> None:
+    from text_store import INSERT_BLOB_SQL, blob_rows, register_text_functions, text_hash
+
+    start = datetime(2015, 1, 1)
+    conn = sqlite3.connect(path)
+    register_text_functions(conn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(INSERT_BLOB_SQL, blob_rows([""]))
+    empty = text_hash("")
+    batch = []
+    for i in range(rows):
+        published = start + timedelta(seconds=random.randrange(10 * 365 * 86400))
+        batch.append((
+            f"Synthetic article {i}", empty, f"https://example.com/{i}",
+            random.choice(SOURCES), random.choice(CATEGORIES), None, 85.0,
+            published.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        ))
+        if len(batch) == 50000:
+            conn.executemany(
+                "INSERT INTO news (title, content_hash, url, source, category, author, trust_score, published_date)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany(
+            "INSERT INTO news (title, content_hash, url, source, category, author, trust_score, published_date)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def count_rows(path: str, source=None) -> int:
+    conn = sqlite3.connect(path)
+    where, params = ("WHERE source = ?", [source]) if source else ("", [])
+    count = conn.execute(f"SELECT count(*) FROM news {where}", params).fetchone()[0]
+    conn.close()
+    return count
+
+
+def cursor_at(path: str, depth: int, source=None) -> str:
+    from routers.news import _encode_cursor
+
+    conn = sqlite3.connect(path)
+    where, params = ("WHERE source = ?", [source]) if source else ("", [])
+    published, news_id = conn.execute(
+        f"SELECT published_date, id FROM news {where} ORDER BY published_date DESC, id DESC"
+        " LIMIT 1 OFFSET ?", params + [depth - 1]).fetchone()
+    conn.close()
+    return _encode_cursor(datetime.fromisoformat(published), news_id)
+
+
+async def run(args, path: str) -> None:
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def timed(params) -> float:
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = await client.get("/api/news/summary", params=params)
+                response.raise_for_status()
+                samples.append((time.perf_counter() - start) * 1000)
+            return statistics.median(samples)
+
+        for source in (None, "BBC"):
+            label = f"source={source}" if source else "all sources"
+            print(f"\n{label}, limit {args.limit}")
+            print(f"{'depth':>8}{'offset ms':>12}{'cursor ms':>12}")
+            filters = {"source": source} if source else {}
+            for depth in (1, 1000, 10000, 100000, 500000, 900000):
+                if depth + args.limit > count_rows(path, source):
+                    break
+                offset_ms = await timed({**filters, "limit": args.limit, "skip": depth})
+                cursor = cursor_at(path, depth, source)
+                cursor_ms = await timed({**filters, "limit": args.limit, "cursor": cursor})
+                print(f"{depth:>8}{offset_ms:>12.2f}{cursor_ms:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+    path = os.path.join(workdir, "news.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from database import engine
+    from migrations import run_migrations
+
+    run_migrations(engine)
+    started = time.perf_counter()
+    fill_corpus(path, args.rows)
+    print(f"Generated {args.rows} rows in {time.perf_counter() - started:.1f}s")
+    asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Full-text search latency over a multi-million paragraph synthetic corpus.
+
+Fills a throwaway SQLite file with --articles articles of --paragraphs
+paragraphs each (indexed by the FTS5 triggers as they are inserted), then
+times /api/news/search for common, rare and multi-term queries:
+
+    python bench_search.py --articles 200000 --paragraphs 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+def make_vocabulary(size: int):
+    syllables = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "zi", "pe", "su", "da", "ri"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(random.choice(syllables) for _ in range(random.randint(2, 5))))
+    words = sorted(words)
+    # Zipf-like weights so a few words are very common and most are rare
+    cum_weights, total = [], 0.0
+    for rank in range(len(words)):
+        total += 1 / (rank + 1)
+        cum_weights.append(total)
+    return words, cum_weights
+
+
+def fill_corpus(path: str, articles: int, paragraphs: int, words, weights) -> None:
+    from text_store import INSERT_BLOB_SQL, blob_rows, register_text_functions, text_hash
+
+    conn = sqlite3.connect(path)
+    register_text_functions(conn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    paragraph_id = 0
+    for start in range(0, articles, 10000):
+        news_rows, paragraph_rows = [], []
+        for news_id in range(start + 1, min(start + 10000, articles) + 1):
+            news_rows.append((news_id, " ".join(random.choices(words, cum_weights=weights, k=8)), text_hash(""),
+                              f"https://example.com/{news_id}", "Synthetic", 85.0,
+                              "2024-01-01 00:00:00.000000"))
+            for order in range(1, paragraphs + 1):
+                paragraph_id += 1
+                paragraph_rows.append((paragraph_id, " ".join(random.choices(words, cum_weights=weights, k=30)),
+                                       "Synthetic", order, news_id))
+        conn.executemany(INSERT_BLOB_SQL, blob_rows([""] + [row[1] for row in paragraph_rows]))
+        paragraph_rows = [(row[0], text_hash(row[1])) + row[2:] for row in paragraph_rows]
+        conn.executemany(
+            "INSERT INTO news (id, title, content_hash, url, source, trust_score, published_date)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)", news_rows)
+        conn.executemany(
+            'INSERT INTO paragraphs (id, content_hash, source, "order", news_id) VALUES (?, ?, ?, ?, ?)',
+            paragraph_rows)
+        conn.commit()
+    conn.execute("INSERT INTO paragraphs_fts(paragraphs_fts) VALUES ('optimize')")
+    conn.execute("INSERT INTO news_fts(news_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+
+async def run(args, words) -> None:
+    import httpx
+    from main import app
+
+    queries = {
+        "common word": words[0],
+        "mid-frequency word": words[len(words) // 50],
+        "rare word": words[-1],
+        "two common words": f"{words[1]} {words[2]}",
+        "three mixed words": f"{words[3]} {words[200]} {words[len(words) // 2]}",
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'query':<22}{'scope':<12}{'page':>6}{'median ms':>12}{'p95 ms':>10}")
+        for label, q in queries.items():
+            for scope in ("paragraphs", "articles"):
+                for offset in (0, 100):
+                    samples = []
+                    for _ in range(args.repeat):
+                        start = time.perf_counter()
+                        response = await client.get("/api/news/search", params={
+                            "q": q, "scope": scope, "limit": 20, "offset": offset})
+                        response.raise_for_status()
+                        samples.append((time.perf_counter() - start) * 1000)
+                    samples.sort()
+                    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+                    print(f"{label:<22}{scope:<12}{offset // 20 + 1:>6}"
+                          f"{statistics.median(samples):>12.1f}{p95:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=200000)
+    parser.add_argument("--paragraphs", type=int, default=10)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+    path = os.path.join(workdir, "news.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from database import engine
+    from migrations import run_migrations
+
+    run_migrations(engine)
+    words, weights = make_vocabulary(args.vocabulary)
+    started = time.perf_counter()
+    fill_corpus(path, args.articles, args.paragraphs, words, weights)
+    print(f"Indexed {args.articles * args.paragraphs} paragraphs in {time.perf_counter() - started:.1f}s\n")
+    asyncio.run(run(args, words))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Serialization time and bytes on the wire of one article, by article size.
+
+Builds ORM rows in memory (no database) with --paragraphs paragraphs of
+--words words and --views alternative views each, then times:
+
+    pydantic   validate through schemas.News and dump to JSON, as a
+               response_model does
+    fast       serialization.news_to_dict + orjson, as GET /api/news/{id} does
+    stdlib     the same dicts through the json module (no orjson installed)
+
+and reports the JSON size, its gzip size at GZIP_LEVEL and the time to
+compress it:
+
+    python bench_serialization.py --paragraphs 1 10 50 200
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "government economy market election health climate research policy court report minister "
+    "company energy security trade growth study data public budget vote science technology"
+).split()
+
+
+def make_article(paragraphs: int, words: int, views: int):
+    from models import AlternativeView, News, Paragraph
+
+    rng = random.Random(0)
+
+    def sentence(count: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    news = News(
+        id=1, title=sentence(10), content=sentence(words * paragraphs), url="https://example.com/a",
+        source="Reuters", category="politics", author="Author", trust_score=85.0,
+        published_date=datetime(2024, 5, 1, 12, 30, 15, 123456),
+    )
+    for n in range(paragraphs):
+        paragraph = Paragraph(id=n + 1, content=sentence(words), source="Reuters", order=n + 1, news_id=1)
+        paragraph.alternative_views = [
+            AlternativeView(id=n * views + v + 1, content=sentence(words // 3), source="AP", paragraph_id=n + 1)
+            for v in range(views)
+        ]
+        news.paragraphs.append(paragraph)
+    return news
+
+
+def time_ms(func: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--words", type=int, default=80, help="words per paragraph")
+    parser.add_argument("--views", type=int, default=2, help="alternative views per paragraph")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from pydantic import TypeAdapter
+
+    import serialization
+    from main import GZIP_LEVEL
+    from schemas import News
+
+    adapter = TypeAdapter(News)
+    orjson = serialization.orjson
+
+    def stdlib_dumps(article):
+        serialization.orjson = None
+        try:
+            return serialization.dumps(serialization.news_to_dict(article))
+        finally:
+            serialization.orjson = orjson
+
+    print(f"{'paragraphs':>10}{'JSON KB':>10}{'gzip KB':>10}{'pydantic ms':>13}{'fast ms':>10}"
+          f"{'stdlib ms':>11}{'speedup':>9}{'gzip ms':>9}")
+    for paragraphs in args.paragraphs:
+        article = make_article(paragraphs, args.words, args.views)
+        body = serialization.dumps(serialization.news_to_dict(article))
+        assert body == adapter.dump_json(adapter.validate_python(article, from_attributes=True))
+        assert json.loads(stdlib_dumps(article)) == json.loads(body)
+
+        pydantic_ms = time_ms(lambda: adapter.dump_json(adapter.validate_python(article, from_attributes=True)),
+                              args.repeat)
+        fast_ms = time_ms(lambda: serialization.dumps(serialization.news_to_dict(article)), args.repeat)
+        stdlib_ms = time_ms(lambda: stdlib_dumps(article), args.repeat)
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        gzip_ms = time_ms(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), args.repeat)
+        print(f"{paragraphs:>10}{len(body) / 1024:>10.1f}{len(compressed) / 1024:>10.1f}{pydantic_ms:>13.3f}"
+              f"{fast_ms:>10.3f}{stdlib_ms:>11.3f}{pydantic_ms / fast_ms:>8.1f}x{gzip_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Scripted load benchmark of both backends, run in-process and saved as JSON.
+
+Each app is driven through httpx's ASGI transport (no sockets, no server)
+against throwaway databases in a temporary directory, with its startup and
+shutdown hooks run as under uvicorn. The news API is first seeded with a
+synthetic corpus of --articles articles (--paragraphs paragraphs each, with
+--views alternative views per paragraph). Then, at each --concurrency level,
+--requests requests are drawn from a fixed, seeded mix:
+
+    news API       list, get, create, bulk, patch, analyze
+    extension API  analyze (new and repeated articles), sentiment history
+
+Throughput and p50/p95/p99 per operation are printed and, with --output,
+saved with the commit they were measured at. --compare prints the change
+against an earlier results file:
+
+    python bench_suite.py --output bench-results/$(git rev-parse --short HEAD).json
+    python bench_suite.py --compare bench-results/abc1234.json
+
+The two backends have modules with the same names, so each runs in its own
+subprocess (--app runs just one).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXTENSION_BACKEND = os.path.join(os.path.dirname(os.path.dirname(HERE)), "backend")
+
+# Relative frequency of each operation in the timed workload
+NEWS_MIX = {"list": 25, "get": 30, "create": 10, "bulk": 5, "patch": 10, "analyze": 20}
+EXTENSION_MIX = {"analyze": 60, "history": 40}
+
+# Articles per seeding request
+SEED_CHUNK = 1000
+
+WORDS = (
+    "government economy market election health climate research policy court report minister "
+    "company energy security trade growth study data public budget vote science technology "
+    "investment crisis agreement reform analysis official region growth inflation community "
+    "according said would could announced percent million people year week officials experts"
+).split()
+SOURCES = ["Reuters", "AP", "BBC", "CNN", "Al Jazeera", "The Guardian", "NPR", "DW"]
+DOMAINS = ["reuters.com", "apnews.com", "bbc.com", "cnn.com", "example.com", "unknown-news.net"]
+CATEGORIES = ["politics", "business", "science", "health", "sports", "culture"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SyntheticCorpus:
+    """Deterministic News / Paragraph / AlternativeView payloads.
+
+    Article ``i`` is the same for a given seed and shape, so runs on
+    different commits ingest identical data.
+    """
+
+    def __init__(self, seed: int, paragraphs: int, views: int, words: int):
+        self.seed = seed
+        self.paragraphs = paragraphs
+        self.views = views
+        self.words = words
+
+    def _sentence(self, rng: random.Random, words: int) -> str:
+        text = " ".join(rng.choice(WORDS) for _ in range(words))
+        return text[0].upper() + text[1:] + "."
+
+    def article(self, i: int) -> Dict[str, Any]:
+        rng = random.Random(f"{self.seed}:{i}")
+        paragraphs = [
+            {
+                "content": self._sentence(rng, self.words),
+                "source": rng.choice(SOURCES),
+                "order": n,
+                "alternative_views": [
+                    {"content": self._sentence(rng, self.words // 3 or 1), "source": rng.choice(SOURCES)}
+                    for _ in range(self.views)
+                ],
+            }
+            for n in range(1, self.paragraphs + 1)
+        ]
+        return {
+            "title": f"Synthetic article {i}: {self._sentence(rng, 6)}",
+            "content": "\n\n".join(paragraph["content"] for paragraph in paragraphs),
+            "url": f"https://{rng.choice(DOMAINS)}/news/{i}",
+            "source": rng.choice(SOURCES),
+            "category": rng.choice(CATEGORIES),
+            "author": f"Author {rng.randrange(100)}",
+            "paragraphs": paragraphs,
+        }
+
+    def patch(self, i: int, revision: int) -> Dict[str, Any]:
+        """Article ``i`` with one paragraph rewritten, as a re-scraped page would be"""
+        article = self.article(i)
+        rng = random.Random(f"{self.seed}:{i}:{revision}")
+        changed = rng.randrange(len(article["paragraphs"])) if article["paragraphs"] else None
+        if changed is not None:
+            article["paragraphs"][changed]["content"] = self._sentence(rng, self.words)
+        return {"title": article["title"], "paragraphs": article["paragraphs"]}
+
+
+async def drive(operations: Dict[str, Callable[[random.Random], Awaitable[Any]]], mix: Dict[str, int],
+                requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """Run ``requests`` operations drawn from ``mix`` on ``concurrency`` workers"""
+    rng = random.Random(seed)
+    names = [name for name in mix if name in operations]
+    plan = rng.choices(names, weights=[mix[name] for name in names], k=requests)
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, name in enumerate(plan):
+        queue.put_nowait((index, name))
+
+    async def worker():
+        while not queue.empty():
+            index, name = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                await operations[name](random.Random(seed * 1000003 + index))
+            except Exception:
+                errors[name] += 1
+                continue
+            latencies[name].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed)
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    def describe(samples: List[float], failed: int) -> Dict[str, Any]:
+        if not samples:
+            return {"count": 0, "errors": failed}
+        return {
+            "count": len(samples),
+            "errors": failed,
+            "mean_ms": round(statistics.fmean(samples), 3),
+            "p50_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+        }
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    operations = {name: describe(samples, errors[name]) for name, samples in latencies.items()}
+    operations["all"] = describe(everything, sum(errors.values()))
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(everything) / elapsed, 1) if elapsed else None,
+        "operations": operations,
+    }
+
+
+def _checked(response):
+    response.raise_for_status()
+    return response
+
+
+async def bench_news(args, workdir: str) -> Dict[str, Any]:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'news.db')}"
+    os.environ["PARAGRAPH_INDEX_PATH"] = os.path.join(workdir, "paragraph_index")
+    sys.path.insert(0, HERE)
+    import httpx
+    from main import app
+
+    corpus = SyntheticCorpus(args.seed, args.paragraphs, args.views, args.words)
+    results: Dict[str, Any] = {"levels": {}}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            started = time.perf_counter()
+            ids: List[int] = []
+            for start in range(0, args.articles, SEED_CHUNK):
+                chunk = [corpus.article(i) for i in range(start, min(args.articles, start + SEED_CHUNK))]
+                ids.extend(_checked(await client.post("/api/news/bulk", json=chunk)).json()["ids"])
+            results["seed_seconds"] = round(time.perf_counter() - started, 3)
+            next_article = iter(range(args.articles, sys.maxsize))
+            revisions = iter(range(1, sys.maxsize))
+
+            async def create(rng):
+                response = _checked(await client.post("/api/news/", json=corpus.article(next(next_article))))
+                ids.append(response.json()["id"])
+
+            async def bulk(rng):
+                articles = [corpus.article(next(next_article)) for _ in range(args.bulk_size)]
+                ids.extend(_checked(await client.post("/api/news/bulk", json=articles)).json()["ids"])
+
+            async def list_news(rng):
+                _checked(await client.get("/api/news/", params={"limit": args.page_size}))
+
+            async def get(rng):
+                _checked(await client.get(f"/api/news/{rng.choice(ids)}"))
+
+            async def patch(rng):
+                index = rng.randrange(min(args.articles, len(ids)))
+                _checked(await client.patch(f"/api/news/{ids[index]}", json=corpus.patch(index, next(revisions))))
+
+            async def analyze(rng):
+                article = corpus.article(rng.randrange(args.articles))
+                _checked(await client.post("/api/news/analyze", json={
+                    key: article[key] for key in ("title", "content", "url", "source")
+                }))
+
+            operations = {"list": list_news, "get": get, "create": create, "bulk": bulk,
+                          "patch": patch, "analyze": analyze}
+            for concurrency in args.concurrency:
+                results["levels"][str(concurrency)] = await drive(
+                    operations, NEWS_MIX, args.requests, concurrency, args.seed + concurrency)
+    return results
+
+
+async def bench_extension(args, workdir: str) -> Dict[str, Any]:
+    os.environ["STATE_DB_PATH"] = os.path.join(workdir, "extension_state.db")
+    os.environ["ANALYSIS_JOBS_DB"] = os.path.join(workdir, "analysis_jobs.db")
+    sys.path.insert(0, EXTENSION_BACKEND)
+    import httpx
+    from extension_communicator import app
+
+    corpus = SyntheticCorpus(args.seed, args.paragraphs, args.views, args.words)
+    results: Dict[str, Any] = {"levels": {}}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            next_article = iter(range(sys.maxsize))
+
+            async def analyze(rng):
+                # Half are pages seen before, to exercise the caches as real browsing would
+                i = rng.randrange(args.articles) if rng.random() < 0.5 else args.articles + next(next_article)
+                article = corpus.article(i)
+                _checked(await client.post("/analyze", json={
+                    "title": article["title"], "content": article["content"], "url": article["url"],
+                }))
+
+            async def history(rng):
+                article = corpus.article(rng.randrange(args.articles))
+                _checked(await client.get("/sentiment/history", params={"url": article["url"]}))
+
+            operations = {"analyze": analyze, "history": history}
+            for concurrency in args.concurrency:
+                results["levels"][str(concurrency)] = await drive(
+                    operations, EXTENSION_MIX, args.requests, concurrency, args.seed + concurrency)
+    return results
+
+
+APPS = {"news": bench_news, "extension": bench_extension}
+
+
+def run_app(args, app: str) -> Dict[str, Any]:
+    """Benchmark one app in a fresh subprocess and return its results"""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{app}-")
+    raw = os.path.join(workdir, "results.json")
+    command = [sys.executable, os.path.abspath(__file__), "--app", app, "--raw-output", raw]
+    for name in ("articles", "paragraphs", "views", "words", "requests", "bulk_size", "page_size", "seed"):
+        command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    command += ["--concurrency", *map(str, args.concurrency)]
+    # Request logging would dominate the timings; warnings still show
+    env = {**os.environ, "LOG_SAMPLE_RATE": "0"}
+    subprocess.run(command, cwd=workdir, env=env, check=True)
+    with open(raw) as f:
+        return json.load(f)
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*argv):
+        return subprocess.run(["git", *argv], cwd=HERE, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+
+
+def print_results(results: Dict[str, Any], baseline: Dict[str, Any] = None) -> None:
+    for app, app_results in results["apps"].items():
+        for level, level_results in app_results["levels"].items():
+            print(f"\n{app}, concurrency {level}: {level_results['throughput_rps']} req/s")
+            print(f"{'op':<10}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+                  + (f"{'p50 Δ':>10}{'p99 Δ':>10}" if baseline else ""))
+            for op, stats in level_results["operations"].items():
+                if not stats["count"]:
+                    print(f"{op:<10}{0:>8}{stats['errors']:>8}")
+                    continue
+                line = (f"{op:<10}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10.2f}"
+                        f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+                before = (baseline or {}).get("apps", {}).get(app, {}).get("levels", {}).get(level, {}) \
+                    .get("operations", {}).get(op)
+                if before and before.get("count"):
+                    line += "".join(
+                        f"{(stats[key] / before[key] - 1) * 100:>+9.0f}%" if before[key] else f"{'':>10}"
+                        for key in ("p50_ms", "p99_ms")
+                    )
+                print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=["all", *APPS], default="all")
+    parser.add_argument("--articles", type=int, default=2000, help="articles in the seeded corpus")
+    parser.add_argument("--paragraphs", type=int, default=5, help="paragraphs per article")
+    parser.add_argument("--views", type=int, default=1, help="alternative views per paragraph")
+    parser.add_argument("--words", type=int, default=60, help="words per paragraph")
+    parser.add_argument("--requests", type=int, default=2000, help="timed requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--bulk-size", type=int, default=50, help="articles per timed bulk request")
+    parser.add_argument("--page-size", type=int, default=50, help="articles per timed list request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--raw-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.raw_output:
+        # Child process: benchmark one app in this interpreter
+        results = asyncio.run(APPS[args.app](args, os.getcwd()))
+        with open(args.raw_output, "w") as f:
+            json.dump(results, f)
+        return
+
+    results = {
+        **git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("app", "output", "compare", "raw_output")},
+        "apps": {},
+    }
+    for app in (APPS if args.app == "all" else [args.app]):
+        results["apps"][app] = run_app(args, app)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print(f"Warning: {args.compare} was run with different settings", file=sys.stderr)
+    print_results(results, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""On-disk size and read latency of row text vs content-addressed blobs.
+
+Builds a syndicated-heavy corpus: --stories wire stories, each republished
+by up to --outlets outlets, with --local-share of the copies adding an
+outlet-written paragraph. It is written to a database with the schema the
+shipped news.db has (text in each row, full-text indexes reading it), then a
+copy is brought up to date with run_migrations, which moves the text into
+text_blobs. Both files are vacuumed and compared:
+
+    size       file size, and bytes of text held by rows or blobs
+    latency    median time to read an article's text, and its paragraphs,
+               by random id, on each layout (warm page cache)
+
+    python bench_text_store.py --stories 2000 --outlets 8
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SOURCES = ["Reuters", "AP", "AFP", "BBC", "CNN", "Al Jazeera", "The Guardian", "NPR", "DW", "Yahoo News",
+           "MSN", "Local Herald", "City Tribune", "Regional Post"]
+WORDS = (
+    "government economy market election health climate research policy court report minister "
+    "company energy security trade growth study data public budget vote science technology "
+    "officials said on tuesday according to statement the of and in a to for with that"
+).split()
+
+# Tables as the shipped news.db has them, plus the news_id index and the
+# full-text indexes the previous release built, so only the text layout differs
+LEGACY_SCHEMA = [
+    "CREATE TABLE news (id INTEGER NOT NULL, title VARCHAR(255) NOT NULL, content TEXT NOT NULL,"
+    " url VARCHAR(512) NOT NULL, source VARCHAR(255) NOT NULL, trust_score FLOAT, published_date DATETIME,"
+    " PRIMARY KEY (id))",
+    "CREATE INDEX ix_news_id ON news (id)",
+    'CREATE TABLE paragraphs (id INTEGER NOT NULL, content TEXT NOT NULL, source VARCHAR(255) NOT NULL,'
+    ' "order" INTEGER NOT NULL, news_id INTEGER NOT NULL, PRIMARY KEY (id),'
+    " FOREIGN KEY(news_id) REFERENCES news (id) ON DELETE CASCADE)",
+    "CREATE INDEX ix_paragraphs_id ON paragraphs (id)",
+    "CREATE INDEX ix_paragraphs_news_id ON paragraphs (news_id)",
+    "CREATE TABLE alternative_views (id INTEGER NOT NULL, content TEXT NOT NULL, source VARCHAR(255) NOT NULL,"
+    " paragraph_id INTEGER NOT NULL, PRIMARY KEY (id),"
+    " FOREIGN KEY(paragraph_id) REFERENCES paragraphs (id) ON DELETE CASCADE)",
+    "CREATE INDEX ix_alternative_views_id ON alternative_views (id)",
+    "CREATE VIRTUAL TABLE news_fts USING fts5(title, content, content='news', content_rowid='id',"
+    " tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE paragraphs_fts USING fts5(content, content='paragraphs', content_rowid='id',"
+    " tokenize='porter unicode61 remove_diacritics 2')",
+]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def build_legacy(path: str, args) -> dict:
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    for statement in LEGACY_SCHEMA:
+        conn.execute(statement)
+    news_id = paragraph_id = 0
+    for story in range(args.stories):
+        title = sentence(rng, 9)[:-1]
+        wire = [" ".join(sentence(rng, 16) for _ in range(args.words // 16)) for _ in range(args.paragraphs)]
+        outlets = rng.sample(SOURCES, rng.randint(1, args.outlets))
+        for outlet in outlets:
+            news_id += 1
+            paragraphs = list(wire)
+            if rng.random() < args.local_share:
+                paragraphs.insert(0, " ".join(sentence(rng, 16) for _ in range(args.words // 16)))
+            conn.execute(
+                "INSERT INTO news (id, title, content, url, source, trust_score, published_date)"
+                " VALUES (?, ?, ?, ?, ?, 80.0, '2024-01-01 00:00:00.000000')",
+                (news_id, title, "\n\n".join(paragraphs), f"https://example.com/{story}/{outlet}", outlet),
+            )
+            rows = []
+            for order, content in enumerate(paragraphs, start=1):
+                paragraph_id += 1
+                rows.append((paragraph_id, content, outlet, order, news_id))
+            conn.executemany('INSERT INTO paragraphs (id, content, source, "order", news_id) VALUES (?, ?, ?, ?, ?)',
+                             rows)
+    conn.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO paragraphs_fts(paragraphs_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return {"articles": news_id, "paragraphs": paragraph_id}
+
+
+def migrate(path: str) -> float:
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from database import engine
+    from migrations import run_migrations
+
+    started = time.perf_counter()
+    run_migrations(engine)
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.close()
+    return elapsed
+
+
+def time_reads(conn, sql: str, ids, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        for row_id in ids:
+            started = time.perf_counter()
+            conn.execute(sql, (row_id,)).fetchall()
+            samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stories", type=int, default=2000, help="distinct wire stories")
+    parser.add_argument("--outlets", type=int, default=8, help="most outlets republishing one story")
+    parser.add_argument("--paragraphs", type=int, default=6, help="wire paragraphs per story")
+    parser.add_argument("--words", type=int, default=80, help="words per paragraph")
+    parser.add_argument("--local-share", type=float, default=0.3,
+                        help="share of copies with an outlet-written paragraph")
+    parser.add_argument("--reads", type=int, default=2000, help="random ids read per measurement")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from text_store import register_text_functions
+
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+    legacy_path = os.path.join(workdir, "legacy.db")
+    blob_path = os.path.join(workdir, "blobs.db")
+    try:
+        counts = build_legacy(legacy_path, args)
+        shutil.copy(legacy_path, blob_path)
+        migrate_seconds = migrate(blob_path)
+
+        legacy = sqlite3.connect(legacy_path)
+        blobs = sqlite3.connect(blob_path)
+        register_text_functions(blobs)
+        legacy_text = legacy.execute(
+            "SELECT (SELECT sum(length(CAST(content AS BLOB))) FROM news)"
+            " + (SELECT sum(length(CAST(content AS BLOB))) FROM paragraphs)").fetchone()[0]
+        blob_count, blob_bytes = blobs.execute("SELECT count(*), sum(length(data)) FROM text_blobs").fetchone()
+
+        print(f"{counts['articles']} articles, {counts['paragraphs']} paragraphs from {args.stories} stories; "
+              f"migrated in {migrate_seconds:.2f}s\n")
+        print(f"{'layout':<10}{'file MB':>10}{'text MB':>10}{'texts':>10}")
+        print(f"{'rows':<10}{os.path.getsize(legacy_path) / 2**20:>10.2f}{legacy_text / 2**20:>10.2f}"
+              f"{counts['articles'] + counts['paragraphs']:>10}")
+        print(f"{'blobs':<10}{os.path.getsize(blob_path) / 2**20:>10.2f}{blob_bytes / 2**20:>10.2f}"
+              f"{blob_count:>10}\n")
+
+        rng = random.Random(1)
+        ids = [rng.randint(1, counts["articles"]) for _ in range(args.reads)]
+        reads = [
+            ("article text",
+             "SELECT content FROM news WHERE id = ?",
+             "SELECT content FROM news_text WHERE id = ?"),
+            ("paragraphs",
+             'SELECT content FROM paragraphs WHERE news_id = ? ORDER BY "order"',
+             "SELECT text_inflate(b.data) FROM paragraphs AS p JOIN text_blobs AS b ON b.hash = p.content_hash"
+             ' WHERE p.news_id = ? ORDER BY p."order"'),
+        ]
+        print(f"{'read':<14}{'rows us':>10}{'blobs us':>10}{'ratio':>8}")
+        for label, legacy_sql, blob_sql in reads:
+            legacy_us = time_reads(legacy, legacy_sql, ids, args.repeat)
+            blob_us = time_reads(blobs, blob_sql, ids, args.repeat)
+            print(f"{label:<14}{legacy_us:>10.1f}{blob_us:>10.1f}{blob_us / legacy_us:>7.2f}x")
+        legacy.close()
+        blobs.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,56 @@
-from sqlalchemy import create_engine
+import asyncio
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./news.db"
+from text_store import register_text_functions
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./news.db")
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+# How long a connection waits on a locked database before giving up
+SQLITE_BUSY_TIMEOUT_MS = 5000
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False}  # needed only for SQLite
 )
 
+# Async engine used by the API handlers so queries don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True,
+)
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a writer holds the lock; NORMAL sync is
+    # durable across application crashes in WAL mode and avoids an fsync per commit
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+    # Article and paragraph text is stored compressed; views and FTS triggers inflate it
+    register_text_functions(dbapi_connection)
+
+event.listen(engine, "connect", _configure_sqlite)
+event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+
+# SQLite allows one writer at a time. Queueing writers in-process keeps them
+# from spinning on busy_timeout or failing a read-to-write lock upgrade
+sqlite_write_lock = asyncio.Lock()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -19,4 +59,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -1,14 +1,35 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from typing import List, Optional
+import asyncio
+import logging
+import os
+import sys
 from datetime import datetime
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 import uvicorn
-from database import Base, engine
+
+# Modules shared with the extension API live in net_shared/ at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from database import async_engine, engine
+from net_shared.log_queue import configure_logging
+from net_shared.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from migrations import run_migrations
+from similarity import PARAGRAPH_INDEX_PATH, get_paragraph_index, init_paragraph_index
 from routers import news
 from models import News  # Import the News model
 
+# Access lines are written by a background thread, for LOG_SAMPLE_RATE of
+# requests; warnings are always kept
+configure_logging(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.1")),
+)
+
 app = FastAPI(title="News Analyzer API", version="1.0.0")
 
 # Configure CORS
@@ -19,15 +40,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Compress responses of at least GZIP_MIN_BYTES for clients sending
+# Accept-Encoding: gzip; smaller ones aren't worth the CPU or the header
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
+# Per-route latency, in-flight requests, queries per request and cache
+# counters, served at /metrics; added last so its timings include compression
+metrics = Metrics("news_analyzer")
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+metrics.register_stats("single_flight", news.analysis_flight.stats)
+metrics.register_stats("article_cache", news.article_cache.stats)
+metrics.register_stats("source_credibility", news.source_credibility.stats)
+metrics.register_stats("paragraph_index", lambda: get_paragraph_index().stats())
+
 # Include routers
 app.include_router(news.router)
 
+# Re-reads the source credibility file when it changes
+_credibility_watch: Optional[asyncio.Task] = None
+
 # Startup event to initialize database
 @app.on_event("startup")
 async def startup_event():
-    Base.metadata.create_all(bind=engine)
+    global _credibility_watch
+    run_migrations(engine)
+    init_paragraph_index(engine)
+    news.source_credibility.reload_if_changed()
+    _credibility_watch = asyncio.ensure_future(
+        news.source_credibility.watch(news.SOURCE_CREDIBILITY_RELOAD_SECONDS)
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _credibility_watch is not None:
+        _credibility_watch.cancel()
+    # Persist the similarity index so the next start memory-maps it instead of rebuilding
+    get_paragraph_index().save(PARAGRAPH_INDEX_PATH)
+
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    """Request latency, database and cache metrics in Prometheus text format"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 # Health check endpoint
 @app.get("/")
@@ -46,5 +106,4 @@ async def _main():
     await server.serve()
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(_main())
\ No newline at end of file
@@ -0,0 +1,155 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from database import Base
+from text_store import collect_garbage, store_texts, text_hash
+
+# Columns added to existing tables after their first release. create_all only
+# creates missing tables, so older databases get these through ALTER TABLE.
+ADDED_COLUMNS = {
+    "news": {
+        "category": "VARCHAR(100)",
+        "author": "VARCHAR(255)",
+        "version": "INTEGER NOT NULL DEFAULT 1",
+        "content_hash": "BLOB",
+    },
+    "paragraphs": {
+        "content_hash": "BLOB",
+    },
+}
+
+# Article and paragraph text as the full-text indexes read it: inflated from
+# the content-addressed text_blobs table that the rows refer to
+TEXT_VIEWS = {
+    "news_text": (
+        "SELECT n.id, n.title, text_inflate(b.data) AS content"
+        " FROM news AS n JOIN text_blobs AS b ON b.hash = n.content_hash"
+    ),
+    "paragraph_text": (
+        "SELECT p.id, p.news_id, text_inflate(b.data) AS content"
+        " FROM paragraphs AS p JOIN text_blobs AS b ON b.hash = p.content_hash"
+    ),
+}
+
+# Full-text indexes over article and paragraph text. They are external-content
+# FTS5 tables reading the views above, so the text itself is not stored
+# twice, and triggers keep them in step with every insert, update and delete
+# on the source tables.
+FTS_TABLES = {
+    "news_fts": ("news", "news_text", ["title", "content"]),
+    "paragraphs_fts": ("paragraphs", "paragraph_text", ["content"]),
+}
+FTS_TOKENIZER = "porter unicode61 remove_diacritics 2"
+# Default ``rank`` for each table; article title matches weigh more than body
+FTS_RANK = {
+    "news_fts": "bm25(10.0, 1.0)",
+    "paragraphs_fts": "bm25()",
+}
+
+# Rows whose text is moved into text_blobs per batch when migrating
+TEXT_MIGRATION_BATCH_ROWS = 10000
+
+def _fts_value(row: str, column: str) -> str:
+    if column == "content":
+        return f"(SELECT text_inflate(data) FROM text_blobs WHERE hash = {row}.content_hash)"
+    return f"{row}.{column}"
+
+def _fts_statements(fts_table: str, source_table: str, columns) -> list:
+    cols = ", ".join(columns)
+    new_vals = ", ".join(_fts_value("new", column) for column in columns)
+    old_vals = ", ".join(_fts_value("old", column) for column in columns)
+    watched = ", ".join("content_hash" if column == "content" else column for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_vals});"
+    )
+    insert_new = f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_vals});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source_table} BEGIN "
+        f"{insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source_table} BEGIN "
+        f"{delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {watched} ON {source_table} BEGIN "
+        f"{delete_old} {insert_new} END",
+    ]
+
+def _drop_outdated_fts(conn) -> None:
+    """Drop full-text indexes (and their triggers) built on other content than the text views"""
+    for fts_table, (_, view, _) in FTS_TABLES.items():
+        sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts_table},
+        ).scalar()
+        if sql is not None and f"content='{view}'" not in sql:
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}"))
+            conn.execute(text(f"DROP TABLE {fts_table}"))
+
+def _create_fts(conn) -> None:
+    for view, select_sql in TEXT_VIEWS.items():
+        conn.execute(text(f"CREATE VIEW IF NOT EXISTS {view} AS {select_sql}"))
+    for fts_table, (source_table, view, columns) in FTS_TABLES.items():
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts_table},
+        ).first()
+        if not exists:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {fts_table} USING fts5({', '.join(columns)}, "
+                f"content='{view}', content_rowid='id', tokenize='{FTS_TOKENIZER}')"
+            ))
+            conn.execute(text(
+                f"INSERT INTO {fts_table}({fts_table}, rank) VALUES ('rank', :rank)"
+            ), {"rank": FTS_RANK[fts_table]})
+            # Index rows written before the table existed
+            conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+        for statement in _fts_statements(fts_table, source_table, columns):
+            conn.execute(text(statement))
+
+def _move_text_to_blobs(conn, table: str) -> None:
+    """Store a pre-text_blobs ``content`` column's text as blobs, then drop the column"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(f"SELECT id, content FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": TEXT_MIGRATION_BATCH_ROWS},
+        ).all()
+        if not rows:
+            break
+        store_texts(conn, (row.content for row in rows))
+        conn.execute(
+            text(f"UPDATE {table} SET content_hash = :hash WHERE id = :id"),
+            [{"hash": text_hash(row.content), "id": row.id} for row in rows],
+        )
+        last_id = rows[-1].id
+    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN content"))
+
+def run_migrations(engine: Engine) -> None:
+    """Bring an existing database up to the current models; safe to rerun"""
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        legacy_text = []
+        for table_name, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            for column_name, column_type in columns.items():
+                if column_name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            if "content" in existing:
+                legacy_text.append(table_name)
+
+        # Text used to live in each row; the old full-text indexes read it
+        # from there, so they are rebuilt over the text views below
+        _drop_outdated_fts(conn)
+        for table_name in legacy_text:
+            _move_text_to_blobs(conn, table_name)
+
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+        _create_fts(conn)
+        collect_garbage(conn)
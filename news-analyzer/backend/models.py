@@ -1,30 +1,82 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from itertools import chain
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, LargeBinary, Text, event, select
+from sqlalchemy.orm import Session, column_property, relationship
 from database import Base
 from datetime import datetime
+from text_store import decompress_text, store_texts, text_hash
+
+class TextBlob(Base):
+    """A text stored once, zlib-compressed, under the SHA-256 of its content"""
+    __tablename__ = "text_blobs"
+
+    hash = Column(LargeBinary(32), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    # Length of the uncompressed text, in characters
+    size = Column(Integer, nullable=False)
+
+class StoredText:
+    """``content`` kept in text_blobs and referenced by ``content_hash``.
+
+    Reads decompress the ``content_data`` loaded with the row; assigning
+    ``content`` sets the hash, and the blob is inserted (if new) just
+    before the next flush.
+    """
+
+    @property
+    def content(self):
+        memo = self.__dict__.get("_content_text")
+        if memo is not None and memo[0] == self.content_hash:
+            return memo[1]
+        data = self.content_data
+        if data is None:
+            return None
+        value = decompress_text(data)
+        self.__dict__["_content_text"] = (self.content_hash, value)
+        return value
+
+    @content.setter
+    def content(self, value):
+        self.content_hash = text_hash(value)
+        self.__dict__["_content_text"] = (self.content_hash, value)
+        self.__dict__["_content_unsaved"] = True
 
-class News(Base):
+class News(StoredText, Base):
     __tablename__ = "news"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
-    content = Column(Text, nullable=False)
+    content_hash = Column(LargeBinary(32), nullable=False)
     url = Column(String(512), nullable=False)
     source = Column(String(255), nullable=False)
+    category = Column(String(100), nullable=True)
+    author = Column(String(255), nullable=True)
     trust_score = Column(Float, default=0.0)
     published_date = Column(DateTime, default=datetime.utcnow)
+    # Bumped by every change to the article or its paragraphs; ETags derive from it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Listing sorts by (published_date, id), optionally filtered by source or category
+    __table_args__ = (
+        Index("ix_news_published_date_id", "published_date", "id"),
+        Index("ix_news_source_published_date_id", "source", "published_date", "id"),
+        Index("ix_news_category_published_date_id", "category", "published_date", "id"),
+    )
 
     # Relationships
-    paragraphs = relationship("Paragraph", back_populates="news", cascade="all, delete-orphan")
+    paragraphs = relationship(
+        "Paragraph", back_populates="news", cascade="all, delete-orphan",
+        order_by="[Paragraph.order, Paragraph.id]",
+    )
 
-class Paragraph(Base):
+class Paragraph(StoredText, Base):
     __tablename__ = "paragraphs"
 
     id = Column(Integer, primary_key=True, index=True)
-    content = Column(Text, nullable=False)
+    content_hash = Column(LargeBinary(32), nullable=False)
     source = Column(String(255), nullable=False)
     order = Column(Integer, nullable=False)
-    news_id = Column(Integer, ForeignKey("news.id", ondelete="CASCADE"), nullable=False)
+    news_id = Column(Integer, ForeignKey("news.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
     news = relationship("News", back_populates="paragraphs")
@@ -36,7 +88,26 @@ class AlternativeView(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
     source = Column(String(255), nullable=False)
-    paragraph_id = Column(Integer, ForeignKey("paragraphs.id", ondelete="CASCADE"), nullable=False)
+    paragraph_id = Column(Integer, ForeignKey("paragraphs.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relationships
-    paragraph = relationship("Paragraph", back_populates="alternative_views")
\ No newline at end of file
+    paragraph = relationship("Paragraph", back_populates="alternative_views")
+
+def _content_data(model):
+    return column_property(
+        select(TextBlob.data).where(TextBlob.hash == model.content_hash).correlate_except(TextBlob).scalar_subquery()
+    )
+
+News.content_data = _content_data(News)
+Paragraph.content_data = _content_data(Paragraph)
+
+@event.listens_for(Session, "before_flush")
+def _store_assigned_texts(session, flush_context, instances):
+    # Blobs go in ahead of the rows that refer to them, which the full-text
+    # index triggers read
+    texts = [
+        obj.__dict__["_content_text"][1]
+        for obj in chain(session.new, session.dirty)
+        if isinstance(obj, StoredText) and obj.__dict__.pop("_content_unsaved", False)
+    ]
+    store_texts(session.connection(), texts)
@@ -1,41 +1,321 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import DateTime, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import time
 
-from database import get_db
+from article_cache import ArticleCache, CachedArticle
+from database import get_async_db, sqlite_write_lock
 from models import News as NewsModel, Paragraph as ParagraphModel, AlternativeView as AlternativeViewModel
-from schemas import NewsCreate, News, NewsUpdate, ParagraphCreate, AlternativeViewCreate
+from schemas import News, NewsChanges, NewsSummary, NewsUpdateResult
+from serialization import FastJSONResponse, dumps, news_list_to_dicts, news_to_dict
+from similarity import get_paragraph_index
+from text_store import decompress_text, store_texts, text_hash
+from net_shared.http_cache import CACHE_CONTROL, etag_matches, not_modified, weak_etag
+from net_shared.singleflight import SingleFlight
+from net_shared.source_credibility import DEFAULT_TABLE_PATH, SourceCredibility
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
+# Articles written per batched INSERT round in bulk ingest
+BULK_CHUNK_SIZE = 1000
+
+# Concurrent analyze requests for the same article share one computation
+analysis_flight = SingleFlight()
+
+# Serialized hot articles for GET /{news_id}, dropped by every write to them
+article_cache = ArticleCache(
+    max_entries=int(os.getenv("ARTICLE_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("ARTICLE_CACHE_TTL", "30")),
+)
+
+# Per-domain reputation table; main.py loads it on startup and watches the
+# file for changes. Unlisted sources get UNKNOWN_SOURCE_TRUST_SCORE.
+SOURCE_CREDIBILITY_PATH = os.getenv("SOURCE_CREDIBILITY_PATH", DEFAULT_TABLE_PATH)
+SOURCE_CREDIBILITY_RELOAD_SECONDS = float(os.getenv("SOURCE_CREDIBILITY_RELOAD_SECONDS", "5"))
+source_credibility = SourceCredibility(SOURCE_CREDIBILITY_PATH)
+
+def _analysis_key(news_data: dict) -> str:
+    digest = hashlib.sha256()
+    digest.update(" ".join(str(news_data["title"]).split()).encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(" ".join(str(news_data["content"]).split()).encode("utf-8"))
+    return digest.hexdigest()
+
+def _run_analysis(news_data: dict) -> Dict[str, Any]:
+    return {
+        "trustScore": 85,  # Example score
+        "confidence": 0.9,
+        "sentiment": {
+            "score": 0.75,
+            "label": "positive"
+        },
+        "criteria": [
+            {
+                "name": "Source Credibility",
+                "met": True,
+                "score": 0.8
+            }
+        ],
+        "analysisId": "test-analysis-1",
+    }
+
+def _with_source(analysis: Dict[str, Any], news_data: dict) -> Dict[str, Any]:
+    """Score the article by its source, as create and bulk ingest do (unlisted sources get the default)"""
+    source = source_credibility.lookup(url=news_data.get("url"), source=news_data.get("source"))
+    trust_score = source["score"] if source is not None else source_credibility.default_score
+    criteria = [
+        {"name": "Source Credibility", "met": trust_score >= 50, "score": trust_score / 100}
+        if criterion["name"] == "Source Credibility" else criterion
+        for criterion in analysis["criteria"]
+    ]
+    return {**analysis, "trustScore": trust_score, "criteria": criteria, "source": source}
+
+def _with_paragraphs(query):
+    return query.options(
+        selectinload(NewsModel.paragraphs).selectinload(ParagraphModel.alternative_views)
+    )
+
+async def _get_news_or_404(db: AsyncSession, news_id: int, with_paragraphs: bool = True) -> NewsModel:
+    query = select(NewsModel).where(NewsModel.id == news_id)
+    if with_paragraphs:
+        query = _with_paragraphs(query)
+    news = (await db.execute(query)).scalar_one_or_none()
+    if news is None:
+        raise HTTPException(status_code=404, detail="News not found")
+    return news
+
+def _build_news(news_data: dict) -> NewsModel:
+    news_dict = {
+        k: v for k, v in news_data.items()
+        if k not in ["paragraphs", "alternative_views"]
+    }
+    db_news = NewsModel(**news_dict)
+    for paragraph_data in news_data.get("paragraphs", []):
+        paragraph_dict = {
+            k: v for k, v in paragraph_data.items()
+            if k != "alternative_views"
+        }
+        db_paragraph = ParagraphModel(**paragraph_dict)
+        db_paragraph.alternative_views = [
+            AlternativeViewModel(**alt_view_data)
+            for alt_view_data in paragraph_data.get("alternative_views", [])
+        ]
+        db_news.paragraphs.append(db_paragraph)
+    return db_news
+
+async def _index_paragraphs(paragraphs) -> None:
+    """Append committed (id, news_id, content) paragraphs to the similarity index"""
+    if paragraphs:
+        ids, news_ids, texts = zip(*paragraphs)
+        await run_in_threadpool(get_paragraph_index().add, ids, news_ids, texts)
+
+def _discard_paragraphs(paragraph_ids) -> None:
+    get_paragraph_index().discard(paragraph_ids)
+
+def _encode_cursor(published_date: datetime, news_id: int) -> str:
+    raw = json.dumps([published_date.isoformat(), news_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        published_date, news_id = json.loads(raw)
+        return datetime.fromisoformat(published_date), int(news_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="400: Invalid cursor")
+
+def _page_news(query, skip: int, limit: int, cursor: Optional[str],
+               category: Optional[str], source: Optional[str]):
+    """Filter and order a listing, paging by keyset when a cursor is given.
+
+    Pages are ordered newest first by (published_date, id). A cursor holds the
+    last row of the previous page, so each page is an index range scan
+    whatever its depth; ``skip`` still works but degrades with depth.
+    """
+    if category:
+        query = query.where(NewsModel.category == category)
+    if source:
+        query = query.where(NewsModel.source == source)
+    if cursor:
+        published_date, news_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(NewsModel.published_date, NewsModel.id) < tuple_(published_date, news_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+    return query.order_by(NewsModel.published_date.desc(), NewsModel.id.desc()).limit(limit)
+
+def _set_next_cursor(response: Response, rows, limit: int) -> None:
+    # A short page is the last one; otherwise point the client past its last row
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(last.published_date, last.id)
+
 @router.get("/", response_model=List[News])
 async def get_news(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     source: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(NewsModel)
-    
-    if category:
-        query = query.filter(NewsModel.category == category)
-    if source:
-        query = query.filter(NewsModel.source == source)
-    
-    news = query.order_by(NewsModel.published_date.desc()).offset(skip).limit(limit).all()
-    return news
+    query = _page_news(_with_paragraphs(select(NewsModel)), skip, limit, cursor, category, source)
+    news = (await db.execute(query)).scalars().all()
+    # Serialized straight from the rows; response_model only documents the shape
+    response = FastJSONResponse(news_list_to_dicts(news))
+    _set_next_cursor(response, news, limit)
+    return response
+
+@router.get("/summary", response_model=List[NewsSummary])
+async def get_news_summary(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List view without content or paragraphs, read as plain column rows"""
+    query = select(
+        NewsModel.id,
+        NewsModel.title,
+        NewsModel.source,
+        NewsModel.url,
+        NewsModel.trust_score,
+        NewsModel.published_date,
+    )
+    query = _page_news(query, skip, limit, cursor, category, source)
+    rows = (await db.execute(query)).all()
+    _set_next_cursor(response, rows, limit)
+    return rows
+
+def _fts_query(q: str) -> str:
+    """Turn free text into an FTS5 query matching every word, ignoring operators"""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="400: Search query has no searchable terms")
+    return " ".join(f'"{term}"' for term in terms)
+
+# BM25 reads a term's entire posting list to weigh it, so ranking a query for
+# a near-universal term costs time proportional to the corpus while telling
+# the matches apart by almost nothing. Queries matching more rows than this
+# return the newest matches unranked instead.
+FTS_RANK_MAX_MATCHES = 100000
+
+SEARCH_TABLES = {"articles": "news_fts", "paragraphs": "paragraphs_fts"}
+
+def _search_sql(scope: str, ranked: bool):
+    fts_table = SEARCH_TABLES[scope]
+    snippet_column = -1 if scope == "articles" else 0
+    rank, order = ("rank", "rank") if ranked else ("NULL", "rowid DESC")
+    hits = f"""
+        SELECT rowid, {rank} AS rank,
+               snippet({fts_table}, {snippet_column}, '<mark>', '</mark>', '…', 24) AS snippet
+        FROM {fts_table} WHERE {fts_table} MATCH :q
+        ORDER BY {order} LIMIT :limit OFFSET :offset
+    """
+    outer_order = "hits.rank" if ranked else "hits.rowid DESC"
+    if scope == "articles":
+        return text(f"""
+            SELECT n.id, n.title, n.source, n.url, n.trust_score, n.published_date,
+                   hits.snippet, hits.rank
+            FROM ({hits}) AS hits
+            JOIN news AS n ON n.id = hits.rowid
+            ORDER BY {outer_order}
+        """).columns(published_date=DateTime)
+    return text(f"""
+        SELECT p.id AS paragraph_id, p.news_id, p."order", p.source, n.title, n.url,
+               hits.snippet, hits.rank
+        FROM ({hits}) AS hits
+        JOIN paragraphs AS p ON p.id = hits.rowid
+        JOIN news AS n ON n.id = p.news_id
+        ORDER BY {outer_order}
+    """)
+
+SEARCH_SQL = {
+    (scope, ranked): _search_sql(scope, ranked)
+    for scope in SEARCH_TABLES for ranked in (True, False)
+}
+
+@router.get("/search")
+async def search_news(
+    q: str = Query(..., min_length=1),
+    scope: str = Query("articles", pattern="^(articles|paragraphs)$"),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """BM25-ranked full-text search over stored articles or their paragraphs"""
+    fts_query = _fts_query(q)
+    fts_table = SEARCH_TABLES[scope]
+    # Walking rowids needs no scoring, so probing past the cap stays cheap
+    too_broad = (await db.execute(
+        text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :q "
+             "ORDER BY rowid DESC LIMIT 1 OFFSET :cap"),
+        {"q": fts_query, "cap": FTS_RANK_MAX_MATCHES}
+    )).scalar() is not None
+    rows = (await db.execute(SEARCH_SQL[(scope, not too_broad)], {
+        "q": fts_query, "limit": limit + 1, "offset": offset
+    })).mappings().all()
+    return {
+        "query": q,
+        "scope": scope,
+        "offset": offset,
+        "limit": limit,
+        "has_more": len(rows) > limit,
+        "ranked": not too_broad,
+        "results": [dict(row) for row in rows[:limit]],
+    }
+
+def _news_etag(news_id: int, version: int, published_date: datetime) -> str:
+    # Row ids can be reused after a delete; the creation time tells the articles apart
+    created = hashlib.sha1(published_date.isoformat().encode("ascii")).hexdigest()[:8]
+    return weak_etag(f"{news_id}-{version}-{created}")
 
 @router.get("/{news_id}", response_model=News)
-async def get_news_by_id(news_id: int, db: Session = Depends(get_db)):
-    news = db.query(NewsModel).filter(NewsModel.id == news_id).first()
-    if news is None:
-        raise HTTPException(status_code=404, detail="News not found")
-    return news
+async def get_news_by_id(news_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """An article with its paragraphs, with an ETag that changes whenever it does.
+
+    A matching If-None-Match gets 304 after reading only the article's
+    version, or without touching the database when it is cached.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    cached = article_cache.get(news_id)
+    if cached is None:
+        if if_none_match:
+            row = (await db.execute(
+                select(NewsModel.version, NewsModel.published_date).where(NewsModel.id == news_id)
+            )).one_or_none()
+            if row is None:
+                raise HTTPException(status_code=404, detail="News not found")
+            etag = _news_etag(news_id, *row)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        generation = article_cache.generation
+        news = await _get_news_or_404(db, news_id)
+        cached = CachedArticle(_news_etag(news.id, news.version, news.published_date), dumps(news_to_dict(news)))
+        article_cache.set(news_id, cached, generation)
+    elif etag_matches(if_none_match, cached.etag):
+        return not_modified(cached.etag)
+    return Response(
+        content=cached.body, media_type="application/json",
+        headers={"ETag": cached.etag, "Cache-Control": CACHE_CONTROL},
+    )
 
 @router.post("/", response_model=News, status_code=201)
-async def create_news(news_data: dict, db: Session = Depends(get_db)):
+async def create_news(news_data: dict, db: AsyncSession = Depends(get_async_db)):
     # Ensure paragraphs are properly structured
     if "paragraphs" not in news_data:
         news_data["paragraphs"] = [
@@ -48,100 +328,410 @@ async def create_news(news_data: dict, db: Session = Depends(get_db)):
     
     # Set default trust score if not provided
     if "trust_score" not in news_data:
-        news_data["trust_score"] = 85
+        news_data["trust_score"] = source_credibility.score(url=news_data.get("url"), source=news_data.get("source"))
     try:
-        # Create news article
-        news_dict = {
-            k: v for k, v in news_data.items()
-            if k not in ["paragraphs", "alternative_views"]
-        }
-        db_news = NewsModel(**news_dict)
-        db.add(db_news)
-        db.flush()
-
-        # Create paragraphs
-        if "paragraphs" in news_data:
-            for paragraph_data in news_data["paragraphs"]:
-                paragraph_dict = {
-                    k: v for k, v in paragraph_data.items()
-                    if k != "alternative_views"
-                }
-                paragraph_dict["news_id"] = db_news.id
-                db_paragraph = ParagraphModel(**paragraph_dict)
-                db.add(db_paragraph)
-                db.flush()
-
-                # Create alternative views
-                if "alternative_views" in paragraph_data:
-                    for alt_view_data in paragraph_data["alternative_views"]:
-                        alt_view_dict = alt_view_data.copy()
-                        alt_view_dict["paragraph_id"] = db_paragraph.id
-                        db_alt_view = AlternativeViewModel(**alt_view_dict)
-                        db.add(db_alt_view)
-
-        db.commit()
-        db.refresh(db_news)
-        return db_news
+        async with sqlite_write_lock:
+            # Build the whole article graph and insert it in one flush; the
+            # unit of work assigns foreign keys without a round trip per row
+            db_news = _build_news(news_data)
+            db.add(db_news)
+
+            await db.commit()
+        news_id = db_news.id
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.patch("/{news_id}", response_model=News)
-async def update_news(news_id: int, news_data: dict, db: Session = Depends(get_db)):
-    db_news = db.query(NewsModel).filter(NewsModel.id == news_id).first()
-    if db_news is None:
-        raise HTTPException(status_code=404, detail="News not found")
-    
+    await _index_paragraphs([(p.id, news_id, p.content) for p in db_news.paragraphs])
+    db.expunge_all()
+    return await _get_news_or_404(db, news_id)
+
+def _bulk_rows(articles: List[dict], offset: int):
+    """Normalize articles into uniform row dicts for executemany inserts"""
+    news_rows, paragraph_rows = [], []
+    for index, article in enumerate(articles, start=offset):
+        if not isinstance(article, dict):
+            raise HTTPException(status_code=400, detail=f"400: Article {index} is not a JSON object")
+        missing_fields = [field for field in ["title", "content", "url", "source"] if field not in article]
+        if missing_fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"400: Article {index} missing required field: {', '.join(missing_fields)}"
+            )
+        published_date = article.get("published_date") or datetime.utcnow()
+        if isinstance(published_date, str):
+            try:
+                published_date = datetime.fromisoformat(published_date)
+            except ValueError:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"400: Article {index} published_date is not an ISO 8601 date: {published_date!r}"
+                )
+        news_rows.append({
+            "title": article["title"],
+            "content_hash": text_hash(article["content"]),
+            "url": article["url"],
+            "source": article["source"],
+            "category": article.get("category"),
+            "author": article.get("author"),
+            "trust_score": article["trust_score"] if "trust_score" in article
+            else source_credibility.score(url=article["url"], source=article["source"]),
+            "published_date": published_date,
+        })
+        paragraphs = article.get("paragraphs") or [
+            {"content": article["content"], "source": article["source"], "order": 1}
+        ]
+        for paragraph_index, paragraph in enumerate(paragraphs):
+            if not isinstance(paragraph, dict):
+                raise HTTPException(
+                    status_code=400, detail=f"400: Article {index} paragraph {paragraph_index} is not a JSON object"
+                )
+            missing_fields = [field for field in ["content", "order"] if paragraph.get(field) is None]
+            if missing_fields:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"400: Article {index} paragraph {paragraph_index} missing required field: "
+                           f"{', '.join(missing_fields)}"
+                )
+            for view_index, view in enumerate(paragraph.get("alternative_views", [])):
+                if not isinstance(view, dict) or view.get("content") is None:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"400: Article {index} paragraph {paragraph_index} alternative view "
+                               f"{view_index} missing required field: content"
+                    )
+        paragraph_rows.append(paragraphs)
+    return news_rows, paragraph_rows
+
+async def _bulk_insert_chunk(db: AsyncSession, articles: List[dict], offset: int) -> Dict[str, Any]:
+    news_rows, paragraphs_per_article = _bulk_rows(articles, offset)
+    # Blobs go in first: the full-text index triggers read them as rows are inserted
+    texts = [article["content"] for article in articles]
+    texts.extend(paragraph["content"] for paragraphs in paragraphs_per_article for paragraph in paragraphs)
+    await db.run_sync(store_texts, texts)
+    news_ids = (await db.execute(
+        insert(NewsModel).returning(NewsModel.id, sort_by_parameter_order=True), news_rows
+    )).scalars().all()
+
+    paragraph_rows, views_per_paragraph = [], []
+    for news_id, news_row, paragraphs in zip(news_ids, news_rows, paragraphs_per_article):
+        for paragraph in paragraphs:
+            paragraph_rows.append({
+                "content_hash": text_hash(paragraph["content"]),
+                "source": paragraph.get("source") or news_row["source"],
+                "order": paragraph["order"],
+                "news_id": news_id,
+            })
+            views_per_paragraph.append(paragraph.get("alternative_views", []))
+
+    view_rows, indexed = [], []
+    if paragraph_rows:
+        paragraph_ids = (await db.execute(
+            insert(ParagraphModel).returning(ParagraphModel.id, sort_by_parameter_order=True),
+            paragraph_rows
+        )).scalars().all()
+        indexed = [
+            (paragraph_id, row["news_id"], paragraph["content"])
+            for paragraph_id, row, paragraph in zip(
+                paragraph_ids, paragraph_rows,
+                (paragraph for paragraphs in paragraphs_per_article for paragraph in paragraphs),
+            )
+        ]
+        # Views without a source inherit their paragraph's, as paragraphs do the article's
+        for paragraph_id, row, views in zip(paragraph_ids, paragraph_rows, views_per_paragraph):
+            view_rows.extend(
+                {"content": view["content"], "source": view.get("source") or row["source"],
+                 "paragraph_id": paragraph_id}
+                for view in views
+            )
+    if view_rows:
+        await db.execute(insert(AlternativeViewModel), view_rows)
+
+    return {
+        "ids": list(news_ids),
+        "paragraphs": len(paragraph_rows),
+        "alternative_views": len(view_rows),
+        "indexed": indexed,
+    }
+
+async def _iter_ndjson(request: Request):
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+@router.post("/bulk", status_code=201)
+async def bulk_create_news(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Create many articles with nested paragraphs and alternative views.
+
+    Accepts a JSON array, or one article per line with
+    ``Content-Type: application/x-ndjson`` so large uploads are parsed as they
+    stream in. Everything is written in a single transaction using batched
+    multi-row INSERTs, ``BULK_CHUNK_SIZE`` articles at a time.
+    """
+    started = time.perf_counter()
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+    totals = {"ids": [], "paragraphs": 0, "alternative_views": 0}
+    indexed = []
+
+    async def flush_chunk(chunk: List[dict]):
+        result = await _bulk_insert_chunk(db, chunk, len(totals["ids"]))
+        totals["ids"].extend(result["ids"])
+        totals["paragraphs"] += result["paragraphs"]
+        totals["alternative_views"] += result["alternative_views"]
+        indexed.extend(result["indexed"])
+
     try:
-        # Update news fields
-        news_dict = {k: v for k, v in news_data.items() if k not in ["paragraphs", "alternative_views"]}
-        for field, value in news_dict.items():
-            setattr(db_news, field, value)
-
-        # Update paragraphs
-        if "paragraphs" in news_data:
-            # Remove existing paragraphs and their alternative views
-            for paragraph in db_news.paragraphs:
-                db.delete(paragraph)
-            
-            # Create new paragraphs
-            for paragraph_data in news_data["paragraphs"]:
-                paragraph_dict = {
-                    k: v for k, v in paragraph_data.items()
-                    if k != "alternative_views"
-                }
-                paragraph_dict["news_id"] = db_news.id
-                db_paragraph = ParagraphModel(**paragraph_dict)
-                db.add(db_paragraph)
-                db.flush()
-
-                # Create alternative views
-                if "alternative_views" in paragraph_data:
-                    for alt_view_data in paragraph_data["alternative_views"]:
-                        alt_view_dict = alt_view_data.copy()
-                        alt_view_dict["paragraph_id"] = db_paragraph.id
-                        db_alt_view = AlternativeViewModel(**alt_view_dict)
-                        db.add(db_alt_view)
-
-        db.commit()
-        db.refresh(db_news)
-        return db_news
+        async with sqlite_write_lock:
+            if ndjson:
+                chunk = []
+                async for article in _iter_ndjson(request):
+                    chunk.append(article)
+                    if len(chunk) >= BULK_CHUNK_SIZE:
+                        await flush_chunk(chunk)
+                        chunk = []
+                if chunk:
+                    await flush_chunk(chunk)
+            else:
+                articles = await request.json()
+                if not isinstance(articles, list):
+                    raise HTTPException(status_code=400, detail="400: Expected a JSON array of articles")
+                for start in range(0, len(articles), BULK_CHUNK_SIZE):
+                    await flush_chunk(articles[start:start + BULK_CHUNK_SIZE])
+
+            await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except json.JSONDecodeError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"400: Invalid JSON: {str(e)}")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    elapsed = time.perf_counter() - started
+    await _index_paragraphs(indexed)
+    rows = len(totals["ids"]) + totals["paragraphs"] + totals["alternative_views"]
+    return {
+        "created": len(totals["ids"]),
+        "ids": totals["ids"],
+        "paragraphs": totals["paragraphs"],
+        "alternative_views": totals["alternative_views"],
+        "elapsed_seconds": round(elapsed, 4),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+    }
+
+@router.get("/{news_id}/paragraphs/{paragraph_id}/similar")
+async def get_similar_paragraphs(
+    news_id: int,
+    paragraph_id: int,
+    k: int = Query(10, ge=1, le=100),
+    include_same_article: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stored paragraphs most similar to this one, as candidate alternative views"""
+    paragraph = (await db.execute(
+        select(ParagraphModel).where(ParagraphModel.id == paragraph_id, ParagraphModel.news_id == news_id)
+    )).scalar_one_or_none()
+    if paragraph is None:
+        raise HTTPException(status_code=404, detail="Paragraph not found")
+
+    index = get_paragraph_index()
+    exclude = None if include_same_article else [news_id]
+    # Over-fetch: the paragraph itself and rows deleted by other workers drop out below
+    vectors = await run_in_threadpool(index.vectorize, [paragraph.content])
+    matches = (await run_in_threadpool(index.query, vectors, k + 5, exclude))[0]
+    matches = [match for match in matches if match[0] != paragraph_id]
+
+    rows = (await db.execute(
+        select(
+            ParagraphModel.id, ParagraphModel.news_id, ParagraphModel.content_data, ParagraphModel.source,
+            NewsModel.title, NewsModel.url,
+        )
+        .join(NewsModel, NewsModel.id == ParagraphModel.news_id)
+        .where(ParagraphModel.id.in_([match[0] for match in matches]))
+    )).mappings().all()
+    by_id = {row["id"]: row for row in rows}
+
+    results = []
+    for match_id, _, score in matches:
+        row = by_id.get(match_id)
+        if row is None:
+            continue
+        results.append({
+            "paragraph_id": row["id"],
+            "news_id": row["news_id"],
+            "title": row["title"],
+            "url": row["url"],
+            "source": row["source"],
+            "content": decompress_text(row["content_data"]),
+            "score": round(score, 4),
+        })
+        if len(results) == k:
+            break
+    return {"paragraph_id": paragraph_id, "news_id": news_id, "results": results}
+
+def _differs(row, field: str, value: Any) -> bool:
+    """Whether setting ``field`` to ``value`` changes ``row``.
+
+    Stored text is compared through its content hash instead of being
+    decompressed.
+    """
+    if field == "content" and isinstance(value, str):
+        return getattr(row, "content_hash", None) != text_hash(value)
+    return getattr(row, field, None) != value
+
+def _match_paragraphs(stored: List[ParagraphModel], incoming: List[dict]) -> List[Optional[ParagraphModel]]:
+    """Pair each incoming paragraph with the stored row it should update, if any.
+
+    Identical content is matched first, preferring the same ``order``, so
+    paragraphs that merely moved keep their rows; what is left is matched by
+    ``order``, which turns edits into in-place updates.
+    """
+    matches: List[Optional[ParagraphModel]] = [None] * len(incoming)
+    # Stored rows carry the content-addressed hash of their text already
+    by_hash: Dict[bytes, List[ParagraphModel]] = {}
+    for paragraph in stored:
+        by_hash.setdefault(paragraph.content_hash, []).append(paragraph)
+    hashes = [text_hash(str(data.get("content", ""))) for data in incoming]
+
+    for same_order in (True, False):
+        for i, data in enumerate(incoming):
+            candidates = by_hash.get(hashes[i])
+            if matches[i] is not None or not candidates:
+                continue
+            for paragraph in candidates:
+                if not same_order or paragraph.order == data.get("order"):
+                    matches[i] = paragraph
+                    candidates.remove(paragraph)
+                    break
+
+    matched = {id(paragraph) for paragraph in matches if paragraph is not None}
+    by_order: Dict[Any, List[ParagraphModel]] = {}
+    for paragraph in stored:
+        if id(paragraph) not in matched:
+            by_order.setdefault(paragraph.order, []).append(paragraph)
+    for i, data in enumerate(incoming):
+        if matches[i] is None and by_order.get(data.get("order")):
+            matches[i] = by_order[data.get("order")].pop(0)
+    return matches
+
+def _sync_alternative_views(paragraph: ParagraphModel, incoming: List[dict], changes: Dict[str, Any]) -> None:
+    """Delete the stored views missing from ``incoming`` and insert the new ones.
+
+    Views without a source inherit the paragraph's, as they do on create.
+    """
+    wanted: Dict[Tuple[Any, Any], int] = {}
+    for view_data in incoming:
+        key = (view_data.get("content"), view_data.get("source") or paragraph.source)
+        wanted[key] = wanted.get(key, 0) + 1
+    for view in list(paragraph.alternative_views):
+        if wanted.get((view.content, view.source)):
+            wanted[(view.content, view.source)] -= 1
+        else:
+            paragraph.alternative_views.remove(view)
+            changes["alternative_views_deleted"] += 1
+    for (content, source), count in wanted.items():
+        for _ in range(count):
+            paragraph.alternative_views.append(AlternativeViewModel(content=content, source=source))
+            changes["alternative_views_inserted"] += 1
+
+def _sync_paragraphs(db_news: NewsModel, incoming: List[dict], changes: Dict[str, Any]):
+    """Apply an incoming paragraph list, touching only the rows that differ.
+
+    Alternative views of a matched paragraph are kept unless the incoming
+    paragraph lists its own. Returns (removed paragraphs, paragraphs whose
+    content was written) so the similarity index can follow.
+    """
+    matches = _match_paragraphs(list(db_news.paragraphs), incoming)
+    matched = {id(paragraph) for paragraph in matches if paragraph is not None}
+    removed = [paragraph for paragraph in db_news.paragraphs if id(paragraph) not in matched]
+    written = []
+
+    for paragraph in removed:
+        db_news.paragraphs.remove(paragraph)
+        changes["paragraphs_deleted"] += 1
+
+    for paragraph_data, db_paragraph in zip(incoming, matches):
+        paragraph_dict = {
+            k: v for k, v in paragraph_data.items()
+            if k not in ["alternative_views", "id", "news_id"]
+        }
+        if db_paragraph is None:
+            # New paragraphs without a source take the article's, as on create
+            db_paragraph = ParagraphModel(**{**paragraph_dict, "source": paragraph_dict.get("source") or db_news.source})
+            db_news.paragraphs.append(db_paragraph)
+            written.append(db_paragraph)
+            changes["paragraphs_inserted"] += 1
+        else:
+            dirty = {k: v for k, v in paragraph_dict.items() if _differs(db_paragraph, k, v)}
+            for field, value in dirty.items():
+                setattr(db_paragraph, field, value)
+            if "content" in dirty:
+                written.append(db_paragraph)
+            changes["paragraphs_updated" if dirty else "paragraphs_unchanged"] += 1
+
+        if "alternative_views" in paragraph_data:
+            _sync_alternative_views(db_paragraph, paragraph_data["alternative_views"], changes)
+
+    return removed, written
+
+@router.patch("/{news_id}", response_model=NewsUpdateResult)
+async def update_news(news_id: int, news_data: dict, db: AsyncSession = Depends(get_async_db)):
+    changes = NewsChanges().model_dump()
+    async with sqlite_write_lock:
+        db_news = await _get_news_or_404(db, news_id)
+        
+        try:
+            # Update news fields
+            news_dict = {
+                k: v for k, v in news_data.items() if k not in ["paragraphs", "alternative_views", "version"]
+            }
+            for field, value in news_dict.items():
+                if _differs(db_news, field, value):
+                    setattr(db_news, field, value)
+                    changes["news_updated"] = True
+
+            # Update only the paragraphs that changed
+            removed, written = [], []
+            if "paragraphs" in news_data:
+                removed, written = _sync_paragraphs(db_news, news_data["paragraphs"], changes)
+
+            if any(count for name, count in changes.items() if name != "paragraphs_unchanged"):
+                db_news.version += 1
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
+        article_cache.invalidate(news_id)
+
+    _discard_paragraphs([paragraph.id for paragraph in removed])
+    await _index_paragraphs([(paragraph.id, db_news.id, paragraph.content) for paragraph in written])
+    db.expunge_all()
+    result = NewsUpdateResult.model_validate(await _get_news_or_404(db, news_id))
+    result.changes = NewsChanges(**changes)
+    return result
+
 @router.delete("/{news_id}", status_code=204)
-async def delete_news(news_id: int, db: Session = Depends(get_db)):
-    db_news = db.query(NewsModel).filter(NewsModel.id == news_id).first()
-    if db_news is None:
-        raise HTTPException(status_code=404, detail="News not found")
-    
-    db.delete(db_news)
-    db.commit()
+async def delete_news(news_id: int, db: AsyncSession = Depends(get_async_db)):
+    async with sqlite_write_lock:
+        db_news = await _get_news_or_404(db, news_id)
+        paragraph_ids = [paragraph.id for paragraph in db_news.paragraphs]
+        
+        await db.delete(db_news)
+        await db.commit()
+        article_cache.invalidate(news_id)
+    _discard_paragraphs(paragraph_ids)
     return None
 
 @router.post("/analyze", status_code=200)
-async def analyze_news(news_data: dict, db: Session = Depends(get_db)):
+async def analyze_news(news_data: dict, db: AsyncSession = Depends(get_async_db)):
     # Validate required fields
     required_fields = ["title", "content", "url", "source"]
     missing_fields = [field for field in required_fields if field not in news_data]
@@ -154,23 +744,10 @@ async def analyze_news(news_data: dict, db: Session = Depends(get_db)):
     
     try:
         # Process the analysis
-        analysis_result = {
-            "trustScore": 85,  # Example score
-            "confidence": 0.9,
-            "sentiment": {
-                "score": 0.75,
-                "label": "positive"
-            },
-            "criteria": [
-                {
-                    "name": "Source Credibility",
-                    "met": True,
-                    "score": 0.8
-                }
-            ],
-            "analysisId": "test-analysis-1",
-            "articleUrl": news_data["url"]
-        }
+        analysis = await analysis_flight.do(
+            _analysis_key(news_data), lambda: run_in_threadpool(_run_analysis, news_data)
+        )
+        analysis_result = {**_with_source(analysis, news_data), "articleUrl": news_data["url"]}
         
         return analysis_result
     except Exception as e:
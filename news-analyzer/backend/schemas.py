@@ -53,6 +53,30 @@ class News(NewsBase):
     class Config:
         from_attributes = True
 
+class NewsSummary(BaseModel):
+    id: int
+    title: str
+    source: Optional[str] = None
+    url: Optional[str] = None
+    trust_score: Optional[float] = None
+    published_date: datetime
+
+    class Config:
+        from_attributes = True
+
+class NewsChanges(BaseModel):
+    """Rows touched by a PATCH"""
+    news_updated: bool = False
+    paragraphs_inserted: int = 0
+    paragraphs_updated: int = 0
+    paragraphs_deleted: int = 0
+    paragraphs_unchanged: int = 0
+    alternative_views_inserted: int = 0
+    alternative_views_deleted: int = 0
+
+class NewsUpdateResult(News):
+    changes: NewsChanges = NewsChanges()
+
 class NewsUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
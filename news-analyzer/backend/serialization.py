@@ -0,0 +1,80 @@
+import json
+from typing import Any, Dict, Iterable, List
+
+from starlette.responses import Response
+
+from models import News
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def alternative_view_to_dict(view) -> Dict[str, Any]:
+    return {"content": view.content, "source": view.source, "id": view.id, "paragraph_id": view.paragraph_id}
+
+
+def paragraph_to_dict(paragraph) -> Dict[str, Any]:
+    return {
+        "content": paragraph.content,
+        "source": paragraph.source,
+        "order": paragraph.order,
+        "id": paragraph.id,
+        "news_id": paragraph.news_id,
+        "alternative_views": [alternative_view_to_dict(view) for view in paragraph.alternative_views],
+    }
+
+
+def news_to_dict(news: News) -> Dict[str, Any]:
+    """An article with its paragraphs in the ``schemas.News`` shape, read straight off the ORM row.
+
+    Same keys, order and values as validating the row through ``schemas.News``
+    and dumping it, without building the intermediate Pydantic models.
+    """
+    return {
+        "title": news.title,
+        "content": news.content,
+        "source": news.source,
+        "url": news.url,
+        "category": news.category,
+        "author": news.author,
+        # Not a column yet; the schema defaults it to None
+        "image_url": getattr(news, "image_url", None),
+        "trust_score": float(news.trust_score) if news.trust_score is not None else None,
+        "id": news.id,
+        "published_date": news.published_date,
+        "paragraphs": [paragraph_to_dict(paragraph) for paragraph in news.paragraphs],
+    }
+
+
+def news_list_to_dicts(news: Iterable[News]) -> List[Dict[str, Any]]:
+    return [news_to_dict(item) for item in news]
+
+
+def _default(value: Any) -> Any:
+    # Only reached on the stdlib fallback; orjson encodes datetimes itself
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response for content that is already plain dicts and lists.
+
+    Returning a response directly makes FastAPI skip ``response_model``
+    validation, so endpoints using it build their payloads with the
+    ``*_to_dict`` helpers above.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
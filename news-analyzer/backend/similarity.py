@@ -0,0 +1,345 @@
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from text_store import text_hash
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Rows scored per matrix multiply; bounds the float32 scratch space per query batch
+SCORE_CHUNK_ROWS = 65536
+
+# Rows are unit vectors stored as int8 (value * 127). Cosine similarity is
+# scale-free, so blocks are scored as-is after widening to float32, which is
+# several times cheaper than widening float16.
+QUANT_SCALE = 127
+
+# Matches must score above this; paragraphs sharing no terms score zero
+MIN_SIMILARITY = 0.0
+
+
+def content_digest(content_hash: bytes) -> int:
+    """The first 8 bytes of a paragraph's ``content_hash``, kept per row to spot edited text"""
+    return int.from_bytes(content_hash[:8], "little", signed=True)
+
+
+def _token_buckets(text: str, dims: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash each token to a (bucket, sign) pair with a process-stable hash"""
+    hashes = np.fromiter(
+        (zlib.crc32(token.encode("utf-8")) for token in TOKEN_RE.findall(text.lower())),
+        dtype=np.uint32,
+    )
+    buckets = (hashes & np.uint32(dims - 1)).astype(np.int64)
+    # The top bit is independent of the bucket bits, so use it for the sign
+    signs = np.where(hashes & np.uint32(0x80000000), -1.0, 1.0)
+    return buckets, signs
+
+
+class ParagraphIndex:
+    """In-memory similarity index over paragraph text.
+
+    Each paragraph becomes a hashed term-frequency vector (sublinear TF,
+    signed feature hashing into ``dims`` buckets, L2-normalised) stored as
+    one int8-quantised row of a dense matrix. Queries weight both sides by the
+    current IDF of each bucket and return cosine similarity, so scores
+    stay comparable as the corpus grows without re-encoding stored rows.
+
+    Rows saved with :meth:`save` are memory-mapped by :meth:`load`; rows
+    appended afterwards live in an in-memory tail until the next save. Each
+    row also records a digest of the text it was built from, so a loaded
+    index can be checked against the database (see
+    :func:`init_paragraph_index`).
+    """
+
+    def __init__(self, dims: int = 512):
+        if dims & (dims - 1):
+            raise ValueError("dims must be a power of two")
+        self.dims = dims
+        self._base = np.zeros((0, dims), dtype=np.int8)
+        self._tail: List[np.ndarray] = []
+        self._paragraph_ids = np.zeros(0, dtype=np.int64)
+        self._news_ids = np.zeros(0, dtype=np.int64)
+        self._digests = np.zeros(0, dtype=np.int64)
+        self._doc_freq = np.zeros(dims, dtype=np.int64)
+        # False for rows that were discarded or superseded by a re-added id
+        self._live = np.zeros(0, dtype=bool)
+        self._lock = threading.RLock()
+        # Cached IDF-weighted row norms; refreshed when the corpus has grown
+        self._norms: Optional[np.ndarray] = None
+        self._norms_docs = 0
+
+    def __len__(self) -> int:
+        return len(self._paragraph_ids)
+
+    @property
+    def max_paragraph_id(self) -> int:
+        return int(self._paragraph_ids.max()) if len(self._paragraph_ids) else 0
+
+    def vectorize(self, texts: Iterable[str]) -> np.ndarray:
+        """Unweighted, L2-normalised hashed TF vectors, one row per text"""
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets, signs = _token_buckets(text, self.dims)
+            if not len(buckets):
+                continue
+            counts = np.bincount(buckets, minlength=self.dims).astype(np.float32)
+            signed = np.bincount(buckets, weights=signs, minlength=self.dims).astype(np.float32)
+            # Sublinear TF, keeping the sign the colliding tokens agreed on
+            vector = np.sign(signed) * np.log1p(counts)
+            norm = np.linalg.norm(vector)
+            if norm:
+                matrix[row] = vector / norm
+        return matrix
+
+    def add(self, paragraph_ids: Sequence[int], news_ids: Sequence[int], texts: Sequence[str]) -> None:
+        """Append paragraphs; an id that is already indexed replaces its old row"""
+        texts = list(texts)
+        vectors = self.vectorize(texts)
+        ids = np.asarray(paragraph_ids, dtype=np.int64)
+        digests = np.fromiter((content_digest(text_hash(text)) for text in texts), dtype=np.int64, count=len(texts))
+        with self._lock:
+            self._discard_rows(ids)
+            self._tail.append(np.rint(vectors * QUANT_SCALE).astype(np.int8))
+            self._paragraph_ids = np.concatenate([self._paragraph_ids, ids])
+            self._news_ids = np.concatenate([self._news_ids, np.asarray(news_ids, dtype=np.int64)])
+            self._digests = np.concatenate([self._digests, digests])
+            self._live = np.concatenate([self._live, np.ones(len(ids), dtype=bool)])
+            self._doc_freq += (vectors != 0).sum(axis=0)
+
+    def discard(self, paragraph_ids: Iterable[int]) -> None:
+        """Stop returning these paragraphs, e.g. after they were deleted"""
+        with self._lock:
+            self._discard_rows(np.fromiter(paragraph_ids, dtype=np.int64))
+
+    def live_rows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(paragraph ids, news ids, content digests) of the rows queries can return"""
+        with self._lock:
+            live = self._live
+            return self._paragraph_ids[live], self._news_ids[live], self._digests[live]
+
+    def _discard_rows(self, paragraph_ids: np.ndarray) -> None:
+        if len(paragraph_ids) and len(self._live):
+            self._live &= ~np.isin(self._paragraph_ids, paragraph_ids)
+
+    def _segments(self) -> List[np.ndarray]:
+        """The (possibly memory-mapped) saved rows, then rows appended since"""
+        if len(self._tail) > 1:
+            self._tail = [np.concatenate(self._tail)]
+        return [self._base] + self._tail
+
+    def _chunks(self, from_row: int = 0):
+        """Yield (first row, float32 block) over stored rows from ``from_row`` on"""
+        buffer = np.empty((SCORE_CHUNK_ROWS, self.dims), dtype=np.float32)
+        offset = 0
+        for segment in self._segments():
+            for start in range(max(0, from_row - offset), len(segment), SCORE_CHUNK_ROWS):
+                rows = min(SCORE_CHUNK_ROWS, len(segment) - start)
+                # The buffer is reused, so consumers must be done with a block
+                # before asking for the next one
+                buffer[:rows] = segment[start:start + rows]
+                yield offset + start, buffer[:rows]
+            offset += len(segment)
+
+    def _idf(self) -> np.ndarray:
+        docs = len(self._paragraph_ids)
+        return (np.log((1 + docs) / (1 + self._doc_freq)) + 1).astype(np.float32)
+
+    def _row_norms(self, idf: np.ndarray) -> np.ndarray:
+        docs = len(self._paragraph_ids)
+        # IDF drifts slowly, so norms are only recomputed after ~10% growth;
+        # rows added in between get norms under the current IDF
+        if self._norms is None or docs > self._norms_docs * 1.1 or len(self._norms) > docs:
+            known, self._norms_docs = 0, docs
+            self._norms = np.zeros(0, dtype=np.float32)
+        else:
+            known = len(self._norms)
+        if known < docs:
+            weights = idf * idf
+            extra = [np.sqrt((block * block) @ weights) for _, block in self._chunks(known)]
+            self._norms = np.concatenate([self._norms, np.maximum(np.concatenate(extra), 1e-12)])
+        return self._norms
+
+    def query(self, vectors: np.ndarray, k: int = 10,
+              exclude_news_ids: Optional[Sequence[int]] = None) -> List[List[Tuple[int, int, float]]]:
+        """Top-k (paragraph_id, news_id, score) per query row, best first.
+
+        ``exclude_news_ids[i]`` drops matches from that article for query ``i``,
+        so a paragraph is not matched against its own article.
+        """
+        with self._lock:
+            docs = len(self._paragraph_ids)
+            if not docs or not len(vectors):
+                return [[] for _ in range(len(vectors))]
+            idf = self._idf()
+            norms = self._row_norms(idf)
+            weighted = vectors.astype(np.float32) * (idf * idf)
+            query_norms = np.maximum(np.linalg.norm(vectors * idf, axis=1), 1e-12)
+
+            scores = np.empty((docs, len(vectors)), dtype=np.float32)
+            for start, block in self._chunks():
+                scores[start:start + len(block)] = block @ weighted.T
+            scores /= norms[:, None]
+            scores /= query_norms[None, :]
+
+            scores[~self._live] = -np.inf
+            scores[scores <= MIN_SIMILARITY] = -np.inf
+            if exclude_news_ids is not None:
+                for column, news_id in enumerate(exclude_news_ids):
+                    if news_id is not None:
+                        scores[self._news_ids == news_id, column] = -np.inf
+
+            top = min(k, docs)
+            results = []
+            for column in range(len(vectors)):
+                column_scores = scores[:, column]
+                candidates = np.argpartition(-column_scores, top - 1)[:top]
+                candidates = candidates[np.argsort(-column_scores[candidates])]
+                results.append([
+                    (int(self._paragraph_ids[row]), int(self._news_ids[row]), float(column_scores[row]))
+                    for row in candidates if np.isfinite(column_scores[row])
+                ])
+            return results
+
+    def save(self, path: str) -> None:
+        """Write the index next to ``path`` atomically; reopen with :meth:`load`.
+
+        Discarded rows are dropped from the saved copy (and their document
+        frequencies subtracted), so edits and deletes don't accumulate.
+        """
+        with self._lock:
+            vectors_tmp = f"{path}.vectors.tmp.npy"
+            meta_tmp = f"{path}.meta.tmp.npz"
+            live = self._live
+            shape = (int(live.sum()), self.dims)
+            stored = np.lib.format.open_memmap(vectors_tmp, mode="w+", dtype=np.int8, shape=shape)
+            doc_freq = self._doc_freq.copy()
+            offset = row = 0
+            for segment in self._segments():
+                keep = live[row:row + len(segment)]
+                if not keep.all():
+                    doc_freq -= (segment[~keep] != 0).sum(axis=0)
+                kept = segment[keep]
+                stored[offset:offset + len(kept)] = kept
+                offset += len(kept)
+                row += len(segment)
+            stored.flush()
+            del stored
+            np.savez(
+                meta_tmp,
+                dims=self.dims,
+                paragraph_ids=self._paragraph_ids[live],
+                news_ids=self._news_ids[live],
+                digests=self._digests[live],
+                doc_freq=doc_freq,
+            )
+            os.replace(vectors_tmp, f"{path}.vectors.npy")
+            os.replace(meta_tmp, f"{path}.meta.npz")
+
+    @classmethod
+    def load(cls, path: str) -> "ParagraphIndex":
+        meta = np.load(f"{path}.meta.npz")
+        if "digests" not in meta:
+            raise ValueError(f"Paragraph index at {path} predates content digests")
+        index = cls(dims=int(meta["dims"]))
+        index._base = np.load(f"{path}.vectors.npy", mmap_mode="r")
+        index._paragraph_ids = meta["paragraph_ids"]
+        index._news_ids = meta["news_ids"]
+        index._digests = meta["digests"]
+        index._doc_freq = meta["doc_freq"]
+        index._live = np.ones(len(index._paragraph_ids), dtype=bool)
+        if len(index._base) != len(index._paragraph_ids):
+            raise ValueError(f"Paragraph index at {path} is inconsistent")
+        return index
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "paragraphs": len(self._paragraph_ids),
+            "discarded": int((~self._live).sum()),
+            "dims": self.dims,
+        }
+
+
+PARAGRAPH_INDEX_PATH = os.getenv("PARAGRAPH_INDEX_PATH", "./paragraph_index")
+PARAGRAPH_INDEX_DIMS = int(os.getenv("PARAGRAPH_INDEX_DIMS", "512"))
+# Paragraphs read from the database per batch while catching the index up
+BUILD_BATCH_ROWS = 10000
+
+_paragraph_index = ParagraphIndex(dims=PARAGRAPH_INDEX_DIMS)
+
+def get_paragraph_index() -> ParagraphIndex:
+    return _paragraph_index
+
+def _stale_paragraph_ids(index: ParagraphIndex, conn) -> Tuple[List[int], np.ndarray]:
+    """Paragraphs to (re-)index, and indexed ids no longer in the database.
+
+    Compares the index's rows with ``paragraphs`` by id, article and content
+    hash, so rows added since the last save (including after a crash), text
+    edited in place and ids SQLite handed out again are all caught without
+    reading any text.
+    """
+    from sqlalchemy import text
+
+    ids, news_ids, digests = index.live_rows()
+    order = np.argsort(ids)
+    ids, news_ids, digests = ids[order], news_ids[order], digests[order]
+    seen = np.zeros(len(ids), dtype=bool)
+    stale: List[int] = []
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, news_id, content_hash FROM paragraphs WHERE id > :last_id "
+                 "ORDER BY id LIMIT :batch"),
+            {"last_id": last_id, "batch": BUILD_BATCH_ROWS},
+        ).all()
+        if not rows:
+            break
+        batch_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        if len(ids):
+            positions = np.minimum(np.searchsorted(ids, batch_ids), len(ids) - 1)
+            found = ids[positions] == batch_ids
+            seen[positions[found]] = True
+            batch_news_ids = np.fromiter((row.news_id for row in rows), dtype=np.int64, count=len(rows))
+            batch_digests = np.fromiter(
+                (content_digest(row.content_hash) for row in rows), dtype=np.int64, count=len(rows)
+            )
+            found &= (news_ids[positions] == batch_news_ids) & (digests[positions] == batch_digests)
+            stale.extend(batch_ids[~found].tolist())
+        else:
+            stale.extend(batch_ids.tolist())
+        last_id = rows[-1].id
+    return stale, ids[~seen]
+
+def init_paragraph_index(engine) -> ParagraphIndex:
+    """Load the saved index and bring it in line with the paragraphs table"""
+    global _paragraph_index
+    from sqlalchemy import bindparam, text
+
+    index = None
+    if os.path.exists(f"{PARAGRAPH_INDEX_PATH}.meta.npz"):
+        try:
+            index = ParagraphIndex.load(PARAGRAPH_INDEX_PATH)
+        except ValueError as e:
+            logger.warning("Rebuilding the paragraph index: %s", e)
+    if index is None:
+        index = ParagraphIndex(dims=PARAGRAPH_INDEX_DIMS)
+
+    with engine.connect() as conn:
+        stale, deleted = _stale_paragraph_ids(index, conn)
+        index.discard(deleted.tolist())
+        select_text = text(
+            "SELECT id, news_id, content FROM paragraph_text WHERE id IN :ids ORDER BY id"
+        ).bindparams(bindparam("ids", expanding=True))
+        for start in range(0, len(stale), BUILD_BATCH_ROWS):
+            rows = conn.execute(select_text, {"ids": stale[start:start + BUILD_BATCH_ROWS]}).all()
+            index.add([row.id for row in rows], [row.news_id for row in rows], [row.content for row in rows])
+
+    _paragraph_index = index
+    return index
@@ -1,85 +1,328 @@
-import requests
-import json
-from datetime import datetime
-
-BASE_URL = "http://localhost:8000/api"
-
-def test_create_news_article():
-    # Test data with multiple paragraphs and alternative views
-    test_article = {
-        "title": "The Impact of AI on Modern Healthcare",
-        "content": "Artificial Intelligence is revolutionizing healthcare delivery and patient care.",
-        "url": "https://example.com/ai-healthcare",
-        "source": "Healthcare Technology Review",
-        "trust_score": 85,
-        "paragraphs": [
-            {
-                "content": "AI-powered diagnostic tools are showing remarkable accuracy in detecting diseases early, potentially saving millions of lives.AI-powered diagnostic tools are showing remarkable accuracy in detecting diseases early, potentially saving millions of lives.AI-powered diagnostic tools are showing remarkable accuracy in detecting diseases early, potentially saving millions of lives.AI-powered diagnostic tools are showing remarkable accuracy in detecting diseases early, potentially saving millions of lives.AI-powered diagnostic tools are showing remarkable accuracy in detecting diseases early, potentially saving millions of lives.",
-                "source": "Medical AI Journal",
-                "order": 1,
-                "alternative_views": [
-                    {
-                        "content": "While AI shows promise in diagnostics, concerns about data privacy and algorithmic bias need to be addressed.",
-                        "source": "Healthcare Ethics Quarterly"
-                    },
-
-                    {
-                        "content": "While AI shows promise in diagnostics, concerns about data privacy and algorithmic bias need to be addressed.",
-                        "source": "Healthcare Ethics Quarterly"
-                    },
-                    {
-                        "content": "Traditional diagnostic methods combined with human expertise still outperform AI in complex cases.",
-                        "source": "Clinical Practice Review"
-                    }
-                ]
-            },
-            {
-                "content": "Hospitals implementing AI-based systems report significant improvements in patient care coordination and resource allocation.",
-                "source": "Hospital Management Today",
-                "order": 2,
-                "alternative_views": [
-                    {
-                        "content": "The high cost of AI implementation creates barriers for smaller healthcare facilities.",
-                        "source": "Healthcare Economics Report"
-                    }
-                ]
-            }
-        ]
+import os
+import tempfile
+
+import pytest
+
+# A throwaway database and similarity index, set before the app reads them
+_workdir = tempfile.mkdtemp(prefix="news-test-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'news.db')}")
+os.environ.setdefault("PARAGRAPH_INDEX_PATH", os.path.join(_workdir, "paragraph_index"))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from net_shared.source_credibility import UNKNOWN_SOURCE_TRUST_SCORE
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def article(**fields):
+    return {
+        "title": "Markets rally",
+        "content": "Markets rallied today.",
+        "url": "https://unlisted.example/markets",
+        "source": "Unlisted Daily",
+        **fields,
     }
 
-    try:
-        # Create new article
-        response = requests.post(f"{BASE_URL}/news/", json=test_article)
-        response.raise_for_status()
-        created_article = response.json()
-        print("✅ Successfully created test article")
-        print(f"Article ID: {created_article['id']}")
-
-        # Fetch the created article
-        response = requests.get(f"{BASE_URL}/news/{created_article['id']}")
-        response.raise_for_status()
-        fetched_article = response.json()
-        print("✅ Successfully retrieved article")
-
-        # Verify article structure
-        assert fetched_article['title'] == test_article['title']
-        assert fetched_article['trust_score'] == test_article['trust_score']
-        assert len(fetched_article['paragraphs']) == len(test_article['paragraphs'])
-        print("✅ Article structure verification passed")
-
-        # List all articles
-        response = requests.get(f"{BASE_URL}/news/")
-        response.raise_for_status()
-        articles = response.json()
-        print(f"✅ Successfully retrieved all articles (count: {len(articles)})")
-
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error during API request: {str(e)}")
-    except AssertionError as e:
-        print(f"❌ Verification failed: {str(e)}")
-    except Exception as e:
-        print(f"❌ Unexpected error: {str(e)}")
-
-if __name__ == "__main__":
-    print("Starting News Analyzer API Test...\n")
-    test_create_news_article()
+
+def test_unlisted_source_scores_the_same_on_create_bulk_and_analyze(client):
+    created = client.post("/api/news/", json=article())
+    assert created.status_code == 201
+    assert created.json()["trust_score"] == UNKNOWN_SOURCE_TRUST_SCORE
+
+    bulk = client.post("/api/news/bulk", json=[article(url="https://unlisted.example/bulk")])
+    assert bulk.status_code == 201
+    stored = client.get(f"/api/news/{bulk.json()['ids'][0]}").json()
+    assert stored["trust_score"] == UNKNOWN_SOURCE_TRUST_SCORE
+
+    analysis = client.post("/api/news/analyze", json=article()).json()
+    assert analysis["source"] is None
+    assert analysis["trustScore"] == UNKNOWN_SOURCE_TRUST_SCORE
+    criterion = next(c for c in analysis["criteria"] if c["name"] == "Source Credibility")
+    assert criterion["score"] == UNKNOWN_SOURCE_TRUST_SCORE / 100
+
+
+def test_bulk_alternative_view_inherits_the_paragraph_source(client):
+    payload = article(paragraphs=[{
+        "content": "Markets rallied today.", "order": 1,
+        "alternative_views": [{"content": "Markets were flat."}],
+    }])
+    response = client.post("/api/news/bulk", json=[payload])
+    assert response.status_code == 201
+    stored = client.get(f"/api/news/{response.json()['ids'][0]}").json()
+    assert stored["paragraphs"][0]["alternative_views"][0]["source"] == "Unlisted Daily"
+
+
+def test_bulk_rejects_invalid_items_without_writing_any(client):
+    before = len(client.get("/api/news/summary", params={"limit": 1000}).json())
+    valid = article(url="https://unlisted.example/valid")
+    no_order = article(paragraphs=[{"content": "No order."}])
+    response = client.post("/api/news/bulk", json=[valid, no_order])
+    assert response.status_code == 400
+    assert "Article 1 paragraph 0" in response.json()["detail"]
+    assert "order" in response.json()["detail"]
+
+    no_content = article(paragraphs=[{"content": "Text.", "order": 1, "alternative_views": [{"source": "AP"}]}])
+    response = client.post("/api/news/bulk", json=[no_content])
+    assert response.status_code == 400
+    assert "Article 0 paragraph 0 alternative view 0" in response.json()["detail"]
+
+    assert len(client.get("/api/news/summary", params={"limit": 1000}).json()) == before
+
+
+def similar(client, news_id, paragraph_id):
+    response = client.get(f"/api/news/{news_id}/paragraphs/{paragraph_id}/similar")
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def create_article(client, text, url):
+    created = client.post("/api/news/", json=article(
+        content=text, url=url, paragraphs=[{"content": text, "source": "Unlisted Daily", "order": 1}]
+    )).json()
+    return created["id"], created["paragraphs"][0]["id"]
+
+
+def test_similar_leaves_out_paragraphs_sharing_no_terms(client):
+    news_id, paragraph_id = create_article(client, "Quokkas nibble saltbush", "https://unlisted.example/q")
+    create_article(client, "Volcanic basalt columns", "https://unlisted.example/v")
+    assert similar(client, news_id, paragraph_id) == []
+
+
+def test_index_catches_up_with_an_edit_lost_in_a_crash(client):
+    import shutil
+
+    from similarity import PARAGRAPH_INDEX_PATH
+
+    edited_id, _ = create_article(client, "Glaciers calve icebergs", "https://unlisted.example/g")
+    other_id, other_paragraph_id = create_article(client, "Comets shed dusty tails", "https://unlisted.example/c")
+    # Restart so the index is saved, and keep that copy
+    client.__exit__(None, None, None)
+    saved = {}
+    for suffix in (".meta.npz", ".vectors.npy"):
+        saved[suffix] = f"{PARAGRAPH_INDEX_PATH}{suffix}.bak"
+        shutil.copy(f"{PARAGRAPH_INDEX_PATH}{suffix}", saved[suffix])
+
+    with TestClient(app) as restarted:
+        response = restarted.patch(f"/api/news/{edited_id}", json={
+            "paragraphs": [{"content": "Comets shed dusty tails", "source": "Unlisted Daily", "order": 1}],
+        })
+        assert response.status_code == 200
+        assert response.json()["changes"]["paragraphs_updated"] == 1
+
+    # A crash before shutdown would have left the index as it was saved
+    for suffix, backup in saved.items():
+        os.replace(backup, f"{PARAGRAPH_INDEX_PATH}{suffix}")
+
+    with TestClient(app) as restarted:
+        results = similar(restarted, other_id, other_paragraph_id)
+        assert [result["news_id"] for result in results] == [edited_id]
+        assert results[0]["score"] > 0.99
+
+
+def test_article_etag_is_weak_and_revalidates_gzipped_responses(client):
+    news_id, _ = create_article(client, "Long article body. " * 200, "https://unlisted.example/long")
+    gzipped = client.get(f"/api/news/{news_id}", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    etag = gzipped.headers["etag"]
+    assert etag.startswith('W/"')
+
+    identity = client.get(f"/api/news/{news_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] == etag
+    revalidated = client.get(f"/api/news/{news_id}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+
+def test_paragraph_diff_uses_stored_hashes_without_reading_text(monkeypatch):
+    from models import Paragraph, StoredText
+    from routers.news import _differs, _match_paragraphs
+
+    stored = [
+        Paragraph(content="First.", source="A", order=1),
+        Paragraph(content="Second.", source="A", order=2),
+    ]
+    monkeypatch.setattr(StoredText, "content", property(lambda self: pytest.fail("stored text was inflated")))
+
+    matches = _match_paragraphs(stored, [{"content": "Second.", "order": 1}, {"content": "Third.", "order": 3}])
+    assert matches == [stored[1], None]
+    assert not _differs(stored[0], "content", "First.")
+    assert _differs(stored[0], "content", "Changed.")
+
+
+def test_patch_fills_in_missing_paragraph_and_view_sources(client):
+    news_id, _ = create_article(client, "Rivers flooded the valley", "https://unlisted.example/rivers")
+    response = client.patch(f"/api/news/{news_id}", json={"paragraphs": [
+        {"content": "Rivers flooded the valley", "order": 1,
+         "alternative_views": [{"content": "Officials expected the flooding."}]},
+        {"content": "Roads reopened on Friday", "order": 2},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["changes"]["paragraphs_inserted"] == 1
+    assert response.json()["changes"]["alternative_views_inserted"] == 1
+
+    paragraphs = client.get(f"/api/news/{news_id}").json()["paragraphs"]
+    assert [paragraph["source"] for paragraph in paragraphs] == ["Unlisted Daily", "Unlisted Daily"]
+    assert paragraphs[0]["alternative_views"][0]["source"] == "Unlisted Daily"
+
+    # Sending the same views again leaves them alone
+    again = client.patch(f"/api/news/{news_id}", json={"paragraphs": [
+        {"content": "Rivers flooded the valley", "order": 1,
+         "alternative_views": [{"content": "Officials expected the flooding."}]},
+    ]})
+    assert again.json()["changes"]["alternative_views_inserted"] == 0
+    assert again.json()["changes"]["alternative_views_deleted"] == 0
+
+
+def test_bulk_rejects_non_objects_and_bad_dates(client):
+    response = client.post("/api/news/bulk", json=[1, 2])
+    assert response.status_code == 400
+    assert "Article 0 is not a JSON object" in response.json()["detail"]
+
+    bad_date = article(url="https://unlisted.example/dated", published_date="last Tuesday")
+    response = client.post("/api/news/bulk", json=[article(), bad_date])
+    assert response.status_code == 400
+    assert "Article 1 published_date" in response.json()["detail"]
+
+    response = client.post("/api/news/bulk", json=[article(paragraphs=["Just text."])])
+    assert response.status_code == 400
+    assert "Article 0 paragraph 0 is not a JSON object" in response.json()["detail"]
+
+
+def test_cursor_pages_through_tied_dates_without_gaps_or_repeats(client):
+    dates = ["2024-03-01T09:00:00"] * 3 + ["2024-03-02T09:00:00"] * 4
+    articles = [article(source="Paging Wire", url=f"https://unlisted.example/page/{i}", published_date=date)
+                for i, date in enumerate(dates)]
+    ids = client.post("/api/news/bulk", json=articles).json()["ids"]
+    # Newest first, ties broken by id
+    expected = sorted(ids, key=lambda news_id: (dates[ids.index(news_id)], news_id), reverse=True)
+
+    for path in ("/api/news/summary", "/api/news/"):
+        seen, cursor = [], None
+        for _ in range(len(ids)):
+            params = {"source": "Paging Wire", "limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get(path, params=params)
+            assert response.status_code == 200
+            seen.extend(row["id"] for row in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        else:
+            pytest.fail(f"{path} kept returning pages: {seen}")
+        assert seen == expected
+
+
+def test_malformed_cursor_is_rejected(client):
+    import base64
+
+    not_a_pair = base64.urlsafe_b64encode(b'{"id": 1}').decode("ascii")
+    for cursor in ("not-a-cursor", "%%%", not_a_pair):
+        response = client.get("/api/news/summary", params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "400: Invalid cursor"
+
+
+def search(client, q, scope="articles"):
+    response = client.get("/api/news/search", params={"q": q, "scope": scope})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_search_follows_edits_and_deletes(client):
+    news_id, paragraph_id = create_article(client, "Zephyrine winds reached the coast", "https://unlisted.example/wind")
+    assert [hit["id"] for hit in search(client, "zephyrine")] == [news_id]
+    assert [hit["paragraph_id"] for hit in search(client, "zephyrine", "paragraphs")] == [paragraph_id]
+
+    response = client.patch(f"/api/news/{news_id}", json={
+        "title": "Quillwort spreads inland",
+        "content": "Quillwort spread inland",
+        "paragraphs": [{"content": "Quillwort spread inland", "order": 1}],
+    })
+    assert response.status_code == 200
+    assert search(client, "zephyrine") == []
+    assert search(client, "zephyrine", "paragraphs") == []
+    assert [hit["id"] for hit in search(client, "quillwort")] == [news_id]
+    assert [hit["news_id"] for hit in search(client, "quillwort", "paragraphs")] == [news_id]
+
+    assert client.delete(f"/api/news/{news_id}").status_code == 204
+    assert search(client, "quillwort") == []
+    assert search(client, "quillwort", "paragraphs") == []
+
+
+def test_migration_moves_baseline_text_into_shared_blobs(tmp_path, monkeypatch):
+    import sqlite3
+
+    from sqlalchemy import create_engine, event
+
+    import similarity
+    from bench_text_store import LEGACY_SCHEMA
+    from database import _configure_sqlite
+    from migrations import run_migrations
+    from text_store import register_text_functions
+
+    wire = "Ministers agreed a budget on Tuesday, officials said."
+    articles = {
+        1: ("Café owners welcome the budget", f"Local reaction first.\n\n{wire}", "AP"),
+        2: ("Budget agreed", wire, "Reuters"),
+    }
+    paragraphs = {
+        1: ("Local reaction first.", "AP", 1, 1),
+        2: (wire, "AP", 2, 1),
+        3: (wire, "Reuters", 1, 2),
+    }
+    views = {1: ("Economists expected more.", "BBC", 2)}
+
+    path = str(tmp_path / "news.db")
+    conn = sqlite3.connect(path)
+    for statement in LEGACY_SCHEMA:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO news (id, title, content, url, source, trust_score, published_date)"
+                     " VALUES (?, ?, ?, ?, ?, 80.0, '2024-01-01 00:00:00.000000')",
+                     [(i, title, content, f"https://example.com/{i}", source)
+                      for i, (title, content, source) in articles.items()])
+    conn.executemany('INSERT INTO paragraphs (id, content, source, "order", news_id) VALUES (?, ?, ?, ?, ?)',
+                     [(i, *row) for i, row in paragraphs.items()])
+    conn.executemany("INSERT INTO alternative_views (id, content, source, paragraph_id) VALUES (?, ?, ?, ?)",
+                     [(i, *row) for i, row in views.items()])
+    conn.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO paragraphs_fts(paragraphs_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", _configure_sqlite)
+    run_migrations(engine)
+    # Safe to rerun, as on every startup
+    run_migrations(engine)
+
+    conn = sqlite3.connect(path)
+    register_text_functions(conn)
+    assert {row[0]: row[1:] for row in conn.execute("SELECT id, title, content FROM news_text")} == {
+        i: (title, content) for i, (title, content, _) in articles.items()
+    }
+    assert dict(conn.execute("SELECT id, content FROM paragraph_text")) == {i: row[0] for i, row in paragraphs.items()}
+    assert dict(conn.execute("SELECT id, content FROM alternative_views")) == {i: row[0] for i, row in views.items()}
+    # The wire paragraph is stored once for the two paragraphs and the article that are exactly it
+    distinct = {content for _, content, _ in articles.values()} | {row[0] for row in paragraphs.values()}
+    assert conn.execute("SELECT count(*) FROM text_blobs").fetchone()[0] == len(distinct)
+
+    def matches(fts_table, term):
+        rows = conn.execute(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?", (term,))
+        return sorted(row[0] for row in rows)
+
+    assert matches("news_fts", "cafe") == [1]
+    assert matches("news_fts", "ministers") == [1, 2]
+    assert matches("paragraphs_fts", "ministers") == [2, 3]
+    conn.close()
+
+    monkeypatch.setattr(similarity, "PARAGRAPH_INDEX_PATH", str(tmp_path / "paragraph_index"))
+    monkeypatch.setattr(similarity, "_paragraph_index", similarity._paragraph_index)
+    index = similarity.init_paragraph_index(engine)
+    engine.dispose()
+    results = index.query(index.vectorize([wire]), k=5, exclude_news_ids=[1])[0]
+    assert [(paragraph_id, news_id) for paragraph_id, news_id, _ in results] == [(3, 2)]
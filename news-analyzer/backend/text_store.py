@@ -0,0 +1,69 @@
+import hashlib
+import zlib
+from typing import Dict, Iterable, List
+
+from sqlalchemy import text
+
+# zlib level for stored text; 6 is zlib's default balance of size and speed
+COMPRESSION_LEVEL = 6
+
+# SQL function the views and FTS triggers use to read stored text
+INFLATE_FUNCTION = "text_inflate"
+
+INSERT_BLOB_SQL = "INSERT OR IGNORE INTO text_blobs (hash, data, size) VALUES (:hash, :data, :size)"
+
+
+def text_hash(value: str) -> bytes:
+    """Content address of a text: the SHA-256 digest of its UTF-8 bytes"""
+    return hashlib.sha256(value.encode("utf-8")).digest()
+
+
+def compress_text(value: str) -> bytes:
+    return zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _inflate(data):
+    return decompress_text(data) if data is not None else None
+
+
+def register_text_functions(dbapi_connection) -> None:
+    """Make ``text_inflate(data)`` available on a SQLite connection.
+
+    The text views and the full-text index triggers call it, so every
+    connection that reads those views or writes articles needs it.
+    """
+    dbapi_connection.create_function(INFLATE_FUNCTION, 1, _inflate, deterministic=True)
+
+
+def blob_rows(texts: Iterable[str]) -> List[Dict[str, object]]:
+    """``text_blobs`` rows for ``texts``, one per distinct text"""
+    rows: Dict[bytes, Dict[str, object]] = {}
+    for value in texts:
+        digest = text_hash(value)
+        if digest not in rows:
+            rows[digest] = {"hash": digest, "data": compress_text(value), "size": len(value)}
+    return list(rows.values())
+
+
+def store_texts(conn, texts: Iterable[str]) -> None:
+    """Insert the texts not stored yet, on a SQLAlchemy connection or session"""
+    rows = blob_rows(texts)
+    if rows:
+        conn.execute(text(INSERT_BLOB_SQL), rows)
+
+
+def collect_garbage(conn) -> int:
+    """Delete blobs no article or paragraph refers to any more; returns how many.
+
+    Writes only ever add blobs, since another row may share a text being
+    replaced; this sweep (run at startup) reclaims the ones left behind.
+    """
+    return conn.execute(text(
+        "DELETE FROM text_blobs WHERE hash NOT IN ("
+        " SELECT content_hash FROM news WHERE content_hash IS NOT NULL"
+        " UNION SELECT content_hash FROM paragraphs WHERE content_hash IS NOT NULL)"
+    )).rowcount
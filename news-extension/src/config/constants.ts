@@ -6,6 +6,7 @@ export const CONFIG = {
   ANALYSIS_DASHBOARD_URL: 'http://localhost:8000/analysis', // Using full URL to ensure proper redirection
   ENDPOINTS: {
     ANALYZE: '/analyze',
+    ANALYZE_STREAM: '/analyze/stream',
     SENTIMENT_HISTORY: '/sentiment/history',
     CRITERIA_CHECK: '/criteria',
   }
@@ -15,11 +15,41 @@ export interface AnalysisResponse {
   analysisId: string
 }
 
+export interface ParagraphScore {
+  index: number
+  trustScore: number
+  confidence: number
+  sentiment: number
+  cached: boolean
+}
+
+export type AnalysisStreamEvent =
+  | { event: 'header'; analysisId: string; articleUrl: string; paragraphs: number; cached: boolean }
+  | ({ event: 'paragraph' } & ParagraphScore)
+  | ({ event: 'summary' } & AnalysisResponse)
+  | { event: 'error'; detail: string }
+
 export interface SentimentHistoryResponse {
   history: Array<{
     timestamp: string
     value: number
+    // Set when the history was requested in time buckets
+    min?: number
+    max?: number
+    count?: number
   }>
+  total: number
+  downsampled: boolean
+  bucketSeconds: number | null
+}
+
+export interface SentimentHistoryOptions {
+  start?: string
+  end?: string
+  // Bucket width in seconds; each point is then a bucket's min/mean/max
+  bucket?: number
+  // Most points to return; longer histories are downsampled server-side
+  points?: number
 }
 
 export interface APIError {
@@ -115,8 +145,62 @@ class APIService {
     })
   }
 
-  async getSentimentHistory(url: string): Promise<SentimentHistoryResponse> {
-    return this.fetch<SentimentHistoryResponse>(`${CONFIG.ENDPOINTS.SENTIMENT_HISTORY}?url=${encodeURIComponent(url)}`)
+  // Streams NDJSON events from /analyze/stream; aborting the signal
+  // disconnects, which stops the backend scoring the remaining paragraphs
+  async analyzeContentStream(
+    data: { title: string; content: string; url?: string },
+    onEvent: (event: AnalysisStreamEvent) => void,
+    signal?: AbortSignal
+  ): Promise<void> {
+    const endpoint = CONFIG.ENDPOINTS.ANALYZE_STREAM
+    const response = await fetch(`${this.baseUrl}${endpoint}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'application/x-ndjson',
+        'Origin': window.location.origin,
+      },
+      credentials: 'include',
+      body: JSON.stringify({
+        ...data,
+        url: data.url || window.location.href
+      }),
+      signal,
+    })
+
+    if (!response.ok || !response.body) {
+      const apiError: APIError = {
+        message: `API Error: ${response.statusText}`,
+        timestamp: new Date().toISOString(),
+        endpoint,
+        details: { status: response.status, statusText: response.statusText }
+      }
+      this.addError(apiError)
+      throw apiError
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ''
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffered += decoder.decode(value, { stream: true })
+      const lines = buffered.split('\n')
+      buffered = lines.pop() ?? ''
+      for (const line of lines) {
+        if (line.trim()) onEvent(JSON.parse(line))
+      }
+    }
+    if (buffered.trim()) onEvent(JSON.parse(buffered))
+  }
+
+  async getSentimentHistory(url: string, options: SentimentHistoryOptions = {}): Promise<SentimentHistoryResponse> {
+    const params = new URLSearchParams({ url })
+    for (const [key, value] of Object.entries(options)) {
+      if (value !== undefined) params.set(key, String(value))
+    }
+    return this.fetch<SentimentHistoryResponse>(`${CONFIG.ENDPOINTS.SENTIMENT_HISTORY}?${params}`)
   }
 }
 